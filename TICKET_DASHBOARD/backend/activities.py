@@ -0,0 +1,219 @@
+from bson import ObjectId
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from pymongo import UpdateOne
+import asyncio
+import sys
+from .config import Config
+from .db import get_async_db, utc_now
+from .pagination import parse_activity_cursor
+
+
+# With ACTIVITY_STORAGE=buckets, activities are appended to one document per
+# project and ACTIVITY_BUCKET_SECONDS period:
+#   {project_id, start, end, count, events: [{_id, project_id, ticket_id, message, actor_email, created_at}]}
+# A bucket holds at most ACTIVITY_BUCKET_MAX_EVENTS events; a busier period
+# opens another bucket with the same start. Event _ids keep the
+# (created_at, _id) keyset cursors of the documents mode valid.
+BUCKETS = "activity_buckets"
+
+
+def bucketed() -> bool:
+    return Config.ACTIVITY_STORAGE == "buckets"
+
+
+def bucket_start(created_at: datetime) -> datetime:
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    seconds = int(created_at.timestamp())
+    return datetime.fromtimestamp(seconds - seconds % Config.ACTIVITY_BUCKET_SECONDS, timezone.utc)
+
+
+async def record_activities(db, activities: List[dict]) -> None:
+    if not activities:
+        return
+    if not bucketed():
+        if len(activities) == 1:
+            await db["activities"].insert_one(activities[0].copy())
+        else:
+            await db["activities"].insert_many([a.copy() for a in activities], ordered=False)
+    else:
+        await push_to_buckets(db, activities)
+
+
+async def record_activity(db, activity: dict) -> None:
+    await record_activities(db, [activity])
+
+
+async def push_to_buckets(db, activities: List[dict]) -> None:
+    grouped: Dict[Tuple[int, datetime], List[dict]] = {}
+    for activity in activities:
+        key = (int(activity["project_id"]), bucket_start(activity["created_at"]))
+        grouped.setdefault(key, []).append({"_id": ObjectId(), **activity})
+
+    operations = []
+    size = Config.ACTIVITY_BUCKET_MAX_EVENTS
+    for (project_id, start), events in grouped.items():
+        for i in range(0, len(events), size):
+            chunk = events[i:i + size]
+            operations.append(UpdateOne(
+                # a bucket without room stops matching and the upsert opens a new one
+                {"project_id": project_id, "start": start, "count": {"$lte": size - len(chunk)}},
+                {
+                    "$push": {"events": {"$each": chunk}},
+                    "$inc": {"count": len(chunk)},
+                    "$max": {"end": max(e["created_at"] for e in chunk)},
+                },
+                upsert=True,
+            ))
+    await db[BUCKETS].bulk_write(operations, ordered=False)
+
+
+async def read_bucket_page(db, base: dict, limit: int, cursor: Optional[str], fields: Optional[dict]) -> List[dict]:
+    """Up to limit + 1 events newest first, the same rows the documents query returns.
+
+    Periods are read newest first, one aggregation each: the period's buckets are
+    unwound, sorted and limited in Mongo, so only the rows still missing from the
+    page come back. Every event of an older period is older than every event of a
+    newer one, so reading stops once the page is full. The first period tried is the
+    cursor's (or the current) one; an empty guess costs one lookup of the next
+    period that has buckets.
+    """
+    need = limit + 1
+    after_match = None
+    if cursor:
+        created_at, oid = parse_activity_cursor(cursor)
+        # BSON dates come back naive UTC
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+        after_match = {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": oid}},
+        ]}
+        period = bucket_start(created_at).replace(tzinfo=None)
+    else:
+        period = bucket_start(utc_now()).replace(tzinfo=None)
+
+    events: List[dict] = []
+    guessed = True
+    while len(events) < need:
+        if not guessed:
+            older = await db[BUCKETS].find_one({**base, "start": {"$lt": period}}, {"_id": 0, "start": 1},
+                                               sort=[("start", -1)])
+            if older is None:
+                break
+            period = older["start"]
+        pipeline = [
+            {"$match": {**base, "start": period}},
+            {"$unwind": "$events"},
+            {"$replaceRoot": {"newRoot": "$events"}},
+        ]
+        if after_match:
+            pipeline.append({"$match": after_match})
+        pipeline += [
+            {"$sort": {"created_at": -1, "_id": -1}},
+            {"$limit": need - len(events)},
+        ]
+        if fields:
+            pipeline.append({"$project": {**{k: 1 for k, v in fields.items() if v}, "_id": 1}})
+        rows = await db[BUCKETS].aggregate(pipeline)
+        events.extend(await rows.to_list())
+        guessed = False
+    return events
+
+
+async def iterate(items: List[dict]) -> AsyncIterator[dict]:
+    for item in items:
+        yield item
+
+
+async def migrate_to_buckets(db, batch_size: int = 1000) -> int:
+    #copy the activities collection into buckets, oldest first; run once when switching storage modes
+    migrated = 0
+    batch: List[dict] = []
+    async for activity in db["activities"].find().sort("created_at", 1):
+        batch.append(activity)
+        if len(batch) == batch_size:
+            await push_to_buckets(db, batch)
+            migrated += len(batch)
+            batch = []
+    if batch:
+        await push_to_buckets(db, batch)
+        migrated += len(batch)
+    print(f"✅ Migrated {migrated} activities into {BUCKETS}")
+    return migrated
+
+
+class ActivityRetention:
+    """Periodically removes activities older than ACTIVITY_RETENTION_DAYS.
+
+    Expired documents (or whole buckets, by their newest event) are copied to
+    `<collection>_archive` with a server-side $merge before they are deleted,
+    unless ACTIVITY_ARCHIVE_ENABLED is false.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+
+    async def prune(self) -> int:
+        collection, field = (BUCKETS, "end") if bucketed() else ("activities", "created_at")
+        expired = {field: {"$lt": utc_now() - timedelta(days=Config.ACTIVITY_RETENTION_DAYS)}}
+        db = get_async_db()
+        try:
+            if Config.ACTIVITY_ARCHIVE_ENABLED:
+                cursor = await db[collection].aggregate([
+                    {"$match": expired},
+                    {"$merge": {"into": f"{collection}_archive", "on": "_id",
+                                "whenMatched": "keepExisting", "whenNotMatched": "insert"}},
+                ])
+                await cursor.to_list()
+            result = await db[collection].delete_many(expired)
+            if result.deleted_count:
+                print(f"✅ Pruned {result.deleted_count} documents from {collection}")
+            return result.deleted_count
+        except Exception as e:
+            print(f"❌ Activity retention failed: {e}")
+            return 0
+
+    async def _run(self) -> None:
+        while True:
+            await self.prune()
+            await asyncio.sleep(Config.ACTIVITY_RETENTION_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        if Config.ACTIVITY_RETENTION_DAYS > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+activity_retention: ActivityRetention | None = None
+
+
+def get_activity_retention() -> ActivityRetention:
+    global activity_retention
+
+    if activity_retention is None:
+        activity_retention = ActivityRetention()
+
+    return activity_retention
+
+
+if __name__ == "__main__":
+    # python -m backend.activities migrate
+    from .db import close_db, init_db
+
+    async def main():
+        await init_db()
+        try:
+            await migrate_to_buckets(get_async_db())
+        finally:
+            await close_db()
+
+    if sys.argv[1:] != ["migrate"]:
+        raise SystemExit("usage: python -m backend.activities migrate")
+    asyncio.run(main())
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Security, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Security, BackgroundTasks, Request
 from fastapi.security import APIKeyHeader
 import time
 import secrets
@@ -7,39 +7,48 @@ from .db import get_database, get_next_sequence, utc_now
 from .config import Config
 from .schemas import OTPRequest, OTPVerify
 from .mail import send_otp_email
+from .cache import TTLCache
+from .otp import get_otp_store
+from .metrics import register_gauge
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-otp_store = {}
+api_key_header = APIKeyHeader(name="Authorization")
+
+# user_id -> user document, so authenticated requests skip the users lookup
+principal_cache = TTLCache(maxsize=Config.PRINCIPAL_CACHE_SIZE, ttl=Config.PRINCIPAL_CACHE_TTL_SECONDS)
+# raw token -> user_id for tokens already verified, kept no longer than their exp
+token_cache = TTLCache(maxsize=Config.PRINCIPAL_CACHE_SIZE, ttl=Config.JWT_TTL_SECONDS)
 
 
 @router.post("/request-otp")
-async def request_otp(data: OTPRequest, bg_tasks: BackgroundTasks):
+async def request_otp(data: OTPRequest, request: Request, bg_tasks: BackgroundTasks):
+    store = get_otp_store()
+    window = Config.OTP_THROTTLE_WINDOW_SECONDS
+    # throttle before sending so the email path cannot be used to amplify load; the client address is
+    # resolved by uvicorn from X-Forwarded-For of trusted proxies only (FORWARDED_ALLOW_IPS)
+    ip = request.client.host if request.client else "unknown"
+    if (not await store.hit(f"ip:{ip}", Config.OTP_IP_LIMIT, window)
+            or not await store.hit(f"email:{data.email}", Config.OTP_EMAIL_LIMIT, window)):
+        raise HTTPException(status_code=429, detail="Too many OTP requests, try again later")
+
     code = str(secrets.randbelow(900000) + 100000)
-    otp_store[data.email] = {
-        'code': code, 
-        'expires_at': time.time() + 300  # 5 minutes
-    }
+    await store.put(data.email, code, Config.OTP_TTL_SECONDS)
     
     bg_tasks.add_task(send_otp_email, data.email, code)
     return {"message": "Login thru OTP, sent to email"}
 
 
 @router.post("/verify-otp")
-def verify_otp(data: OTPVerify, db = Depends(get_database)):
-    email = data.email
-    stored_otp = otp_store.get(email)
-    
-    if not stored_otp or stored_otp['expires_at'] < time.time() or stored_otp['code'] != data.code:
+async def verify_otp(data: OTPVerify, db = Depends(get_database)):
+    if not await get_otp_store().consume(data.email, data.code):
         raise HTTPException(status_code=400, detail="Invalid or expired OTP")
-    
-    del otp_store[data.email]
         
-    user = db["users"].find_one({"email": data.email})
+    user = await db["users"].find_one({"email": data.email})
     if not user:
-        new_id = get_next_sequence(db, "users")
-        db["users"].insert_one({"id": new_id, "email": data.email, "created_at": utc_now()})
-        user = db["users"].find_one({"id": new_id})
+        new_id = await get_next_sequence(db, "users")
+        await db["users"].insert_one({"id": new_id, "email": data.email, "created_at": utc_now()})
+        user = await db["users"].find_one({"id": new_id})
 
     payload = {
         "sub": str(user["id"]), 
@@ -55,30 +64,62 @@ def verify_otp(data: OTPVerify, db = Depends(get_database)):
 
 # Authentication dependency
 
-def get_current_user(authorization = Security(APIKeyHeader(name="Authorization")), db = Depends(get_database)):
+def decode_token(token: str) -> int:
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+
+    payload = jwt.decode(token, Config.JWT_SECRET, algorithms=[Config.JWT_ALG])
+    user_id = int(payload.get("sub"))
+
+    exp = payload.get("exp")
+    if exp is not None:
+        token_cache.set(token, user_id, expires_at=time.monotonic() + (float(exp) - time.time()))
+    return user_id
+
+
+async def get_current_user(authorization = Security(api_key_header), db = Depends(get_database)):
     """Simple authentication - expects 'Bearer <token>' format"""
     try:
         if not authorization or not authorization.startswith("Bearer "):
             raise HTTPException(status_code=401, detail="Missing or invalid authorization header")
         
         token = authorization.split(" ")[1]
-        payload = jwt.decode(token, Config.JWT_SECRET, algorithms=[Config.JWT_ALG])
-        user_id = int(payload.get("sub"))
+        user_id = decode_token(token)
 
     except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     except Exception:
         raise HTTPException(status_code=401, detail="Authentication failed")
 
-    user = db["users"].find_one({"id": user_id})
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+    user = principal_cache.get(user_id)
+    if user is None:
+        user = await db["users"].find_one({"id": user_id})
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        principal_cache.set(user_id, user)
 
     return user
 
 
+def invalidate_principal(user_id: int, token: str | None = None) -> None:
+    principal_cache.invalidate(int(user_id))
+    if token:
+        token_cache.invalidate(token)
+
+
+def principal_cache_stats() -> dict:
+    return {"principals": principal_cache.stats(), "tokens": token_cache.stats()}
+
+
+for _cache_name, _cache in (("principal", principal_cache), ("token", token_cache)):
+    for _stat in ("size", "hits", "misses", "evictions"):
+        register_gauge(f"auth_{_cache_name}_cache_{_stat}", f"{_cache_name} cache {_stat}",
+                       lambda cache=_cache, stat=_stat: cache.stats()[stat])
+
+
 @router.get("/me")
-def get_current_user_info(user = Depends(get_current_user)):
+async def get_current_user_info(user = Depends(get_current_user)):
     return {
         "id": user["id"],
         "email": user["email"],
@@ -87,8 +128,14 @@ def get_current_user_info(user = Depends(get_current_user)):
 
 
 @router.post("/logout")
-def logout_user(user = Depends(get_current_user), db = Depends(get_database)):
+async def logout_user(user = Depends(get_current_user), db = Depends(get_database), authorization = Security(api_key_header)):
     user_id = int(user["id"])
-    db["user_super_toggle"].delete_one({"user_id": user_id})
+    await db["user_super_toggle"].delete_one({"user_id": user_id})
+    invalidate_principal(user_id, authorization.split(" ")[1])
     
-    return {"message": "Logged out successfully"}
\ No newline at end of file
+    return {"message": "Logged out successfully"}
+
+
+@router.get("/cache-stats")
+async def get_cache_stats(user = Depends(get_current_user)):
+    return principal_cache_stats()
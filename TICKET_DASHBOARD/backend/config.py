@@ -16,13 +16,91 @@ class Settings(BaseSettings):
     
     MONGO_SSL_ENABLED: bool = os.getenv("MONGO_SSL_ENABLED", "true").lower() == "true"
     MONGO_TLS_ALLOW_INVALID_CERTIFICATES: bool = os.getenv("MONGO_TLS_ALLOW_INVALID_CERTIFICATES", "true").lower() == "true"
+    # false -> keep the blocking pymongo driver (run in the threadpool) during migration
+    MONGO_ASYNC_ENABLED: bool = os.getenv("MONGO_ASYNC_ENABLED", "true").lower() == "true"
+    MONGO_ENSURE_INDEXES: bool = os.getenv("MONGO_ENSURE_INDEXES", "true").lower() == "true"
+    MONGO_VERIFY_QUERY_PLANS: bool = os.getenv("MONGO_VERIFY_QUERY_PLANS", "false").lower() == "true"
+    # startup does not wait for Mongo: a background warm-up pings until it answers, then runs the startup jobs
+    MONGO_WARMUP_RETRY_SECONDS: float = float(os.getenv("MONGO_WARMUP_RETRY_SECONDS") or 2)
+    READY_PING_TIMEOUT_SECONDS: float = float(os.getenv("READY_PING_TIMEOUT_SECONDS") or 2)
+    # connection pool per server; 0 leaves idle connections open and checkouts waiting until the server selection timeout
+    MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE") or 100)
+    MONGO_MIN_POOL_SIZE: int = int(os.getenv("MONGO_MIN_POOL_SIZE") or 0)
+    MONGO_MAX_IDLE_TIME_MS: int = int(os.getenv("MONGO_MAX_IDLE_TIME_MS") or 0)
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS") or 0)
+    MONGO_MAX_CONNECTING: int = int(os.getenv("MONGO_MAX_CONNECTING") or 2)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS") or 30000)
+    MONGO_CONNECT_TIMEOUT_MS: int = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS") or 30000)
+    MONGO_SOCKET_TIMEOUT_MS: int = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS") or 30000)
+    # wire compression in order of preference, e.g. "zstd,snappy,zlib" (snappy needs python-snappy); empty disables it
+    MONGO_COMPRESSORS: str = os.getenv("MONGO_COMPRESSORS") or ""
+    # read-only endpoints (boards, summary, changes, search, activity feeds); writes and auth always use the primary
+    MONGO_READ_PREFERENCE: str = os.getenv("MONGO_READ_PREFERENCE") or "primary"
+    # bounded staleness for non-primary reads, at least 90; 0 means no bound
+    MONGO_READ_MAX_STALENESS_SECONDS: int = int(os.getenv("MONGO_READ_MAX_STALENESS_SECONDS") or 0)
+    # local | available | majority; empty keeps the server default
+    MONGO_READ_CONCERN: str = os.getenv("MONGO_READ_CONCERN") or ""
+    # ids reserved per counter round-trip (hi/lo allocator); 1 restores one $inc per insert
+    ID_BLOCK_SIZE: int = int(os.getenv("ID_BLOCK_SIZE") or 100)
 
     SUPER_TOGGLE_PWD: str = os.getenv("SUPER_TOGGLE_PWD") or "admin123"
+
+    MAX_PAGE_SIZE: int = int(os.getenv("MAX_PAGE_SIZE") or 500)
+    BULK_MAX_OPERATIONS: int = int(os.getenv("BULK_MAX_OPERATIONS") or 500)
+    # change tokens handed to clients trail the newest writes by this long, so a write that reserved
+    # a token but landed late is not skipped; changes inside the window are sent again
+    CHANGES_OVERLAP_SECONDS: float = float(os.getenv("CHANGES_OVERLAP_SECONDS") or 30)
+    STATUS_COUNTS_REPAIR_ON_STARTUP: bool = os.getenv("STATUS_COUNTS_REPAIR_ON_STARTUP", "false").lower() == "true"
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN") or ""
+
+    # WebSocket fan-out: per-connection outbound queue and slow consumer policy (drop_oldest | disconnect)
+    WS_SEND_QUEUE_SIZE: int = int(os.getenv("WS_SEND_QUEUE_SIZE") or 100)
+    WS_SEND_TIMEOUT_SECONDS: float = float(os.getenv("WS_SEND_TIMEOUT_SECONDS") or 5)
+    WS_SLOW_CONSUMER_POLICY: str = os.getenv("WS_SLOW_CONSUMER_POLICY") or "drop_oldest"
+    WS_HEARTBEAT_INTERVAL_SECONDS: float = float(os.getenv("WS_HEARTBEAT_INTERVAL_SECONDS") or 25)
+    WS_IDLE_TIMEOUT_SECONDS: float = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS") or 60)
+    # events queued for a socket within this window go out as one array frame; 0 sends one frame per event
+    WS_COALESCE_WINDOW_SECONDS: float = float(os.getenv("WS_COALESCE_WINDOW_SECONDS") or 0.05)
+
+    # Cross-worker fan-out and presence: inprocess | mongo (change stream on a capped collection, needs a replica set)
+    PUBSUB_BACKEND: str = os.getenv("PUBSUB_BACKEND") or "inprocess"
+    PUBSUB_CAPPED_SIZE_BYTES: int = int(os.getenv("PUBSUB_CAPPED_SIZE_BYTES") or 16 * 1024 * 1024)
+    PUBSUB_PRESENCE_INTERVAL_SECONDS: int = int(os.getenv("PUBSUB_PRESENCE_INTERVAL_SECONDS") or 5)
+    PUBSUB_RETRY_SECONDS: float = float(os.getenv("PUBSUB_RETRY_SECONDS") or 1)
+
+    # Visit logging: write-behind buffer into last_visit, optional raw user_visits log
+    VISIT_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("VISIT_FLUSH_INTERVAL_SECONDS") or 2)
+    VISIT_FLUSH_MAX_PENDING: int = int(os.getenv("VISIT_FLUSH_MAX_PENDING") or 1000)
+    VISIT_RAW_LOG_ENABLED: bool = os.getenv("VISIT_RAW_LOG_ENABLED", "false").lower() == "true"
+    # raw visits kept for retry while Mongo is unreachable; the oldest are dropped beyond this
+    VISIT_RAW_MAX_BUFFERED: int = int(os.getenv("VISIT_RAW_MAX_BUFFERED") or 100000)
+    VISIT_RAW_LOG_TTL_DAYS: int = int(os.getenv("VISIT_RAW_LOG_TTL_DAYS") or 30)
+
+    # Activity storage: documents (one per activity) | buckets (per-project, per-time-bucket documents)
+    ACTIVITY_STORAGE: str = os.getenv("ACTIVITY_STORAGE") or "documents"
+    ACTIVITY_BUCKET_SECONDS: int = int(os.getenv("ACTIVITY_BUCKET_SECONDS") or 3600)
+    ACTIVITY_BUCKET_MAX_EVENTS: int = int(os.getenv("ACTIVITY_BUCKET_MAX_EVENTS") or 500)
+    # 0 keeps activities forever; older ones are moved to <collection>_archive first when archival is enabled
+    ACTIVITY_RETENTION_DAYS: int = int(os.getenv("ACTIVITY_RETENTION_DAYS") or 0)
+    ACTIVITY_ARCHIVE_ENABLED: bool = os.getenv("ACTIVITY_ARCHIVE_ENABLED", "true").lower() == "true"
+    ACTIVITY_RETENTION_INTERVAL_SECONDS: float = float(os.getenv("ACTIVITY_RETENTION_INTERVAL_SECONDS") or 3600)
     
     JWT_SECRET: str = os.getenv("JWT_SECRET") or ""
     JWT_ALG: str = "HS256"
     JWT_TTL_SECONDS: int = 60 * 60 * 24 * 7
 
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE") or 10000)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS") or 60)
+    # ticket id -> project id; tickets never change project, so entries only age out to bound memory
+    TICKET_PROJECT_CACHE_SIZE: int = int(os.getenv("TICKET_PROJECT_CACHE_SIZE") or 10000)
+
+    # OTP store: memory (single process) | mongo (shared across workers, TTL-indexed)
+    OTP_STORE: str = os.getenv("OTP_STORE") or "memory"
+    OTP_TTL_SECONDS: int = 60 * 5
+    OTP_THROTTLE_WINDOW_SECONDS: int = int(os.getenv("OTP_THROTTLE_WINDOW_SECONDS") or 60 * 15)
+    OTP_EMAIL_LIMIT: int = int(os.getenv("OTP_EMAIL_LIMIT") or 5)
+    OTP_IP_LIMIT: int = int(os.getenv("OTP_IP_LIMIT") or 20)
+
     # Mail configuration (Resend SMTP)
     MAIL_USERNAME: str = os.getenv("MAIL_USERNAME") or "resend"
     MAIL_PASSWORD: SecretStr = SecretStr(os.getenv("MAIL_PASSWORD") or "")
@@ -32,6 +110,23 @@ class Settings(BaseSettings):
     MAIL_FROM_NAME: str = "Admin@Ticket-Dashboard"
     MAIL_STARTTLS: bool = True
     MAIL_SSL_TLS: bool = False
+    MAIL_TRANSPORT: str = os.getenv("MAIL_TRANSPORT") or "resend"  # resend | local
+
+    # Background activity dispatch (WebSocket fan-out + email selection)
+    DISPATCH_QUEUE_SIZE: int = int(os.getenv("DISPATCH_QUEUE_SIZE") or 10000)
+    DISPATCH_WORKERS: int = int(os.getenv("DISPATCH_WORKERS") or 4)
+    DISPATCH_DRAIN_TIMEOUT_SECONDS: float = float(os.getenv("DISPATCH_DRAIN_TIMEOUT_SECONDS") or 10)
+
+    # Activity email outbox: coalescing window, workers, rate limit and retries
+    OUTBOX_COALESCE_SECONDS: float = float(os.getenv("OUTBOX_COALESCE_SECONDS") or 300)
+    OUTBOX_WORKERS: int = int(os.getenv("OUTBOX_WORKERS") or 2)
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE") or 20)
+    OUTBOX_POLL_SECONDS: float = float(os.getenv("OUTBOX_POLL_SECONDS") or 5)
+    OUTBOX_RATE_PER_SECOND: float = float(os.getenv("OUTBOX_RATE_PER_SECOND") or 2)
+    OUTBOX_RATE_BURST: int = int(os.getenv("OUTBOX_RATE_BURST") or 5)
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS") or 5)
+    OUTBOX_RETRY_BASE_SECONDS: float = float(os.getenv("OUTBOX_RETRY_BASE_SECONDS") or 30)
+    OUTBOX_CLAIM_TIMEOUT_SECONDS: float = float(os.getenv("OUTBOX_CLAIM_TIMEOUT_SECONDS") or 300)
 
 
     model_config = SettingsConfigDict(
@@ -0,0 +1,72 @@
+from pymongo import UpdateOne
+from typing import Dict, Optional
+import asyncio
+from .db import utc_now
+
+
+# Per-project ticket counts by status, kept on the project document as
+# `status_counts` and moved with $inc by every ticket write. Databases that
+# predate the counters are rebuilt once on startup (ensure_status_counts).
+
+REBUILT_MARKER = {"_id": "status_counts"}
+
+def status_count_inc(old_status: Optional[str], new_status: Optional[str], inc: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    #$inc fragment for one ticket moving from old_status (None for a new ticket) to new_status
+    inc = inc if inc is not None else {}
+    if old_status == new_status:
+        return inc
+    if old_status is not None:
+        key = f"status_counts.{old_status}"
+        inc[key] = inc.get(key, 0) - 1
+    if new_status is not None:
+        key = f"status_counts.{new_status}"
+        inc[key] = inc.get(key, 0) + 1
+    return inc
+
+
+async def repair_status_counts(db) -> int:
+    """Recompute every project's status_counts from tickets and return the number of projects written.
+
+    Writes racing with the repair can leave a count off by their own delta, so run it on a quiet
+    system or run it twice.
+    """
+    counts: Dict[int, Dict[str, int]] = {}
+    cursor = await db["tickets"].aggregate([
+        {"$group": {"_id": {"project_id": "$project_id", "status": "$status"}, "count": {"$sum": 1}}},
+    ])
+    for row in await cursor.to_list():
+        key = row["_id"]
+        counts.setdefault(int(key["project_id"]), {})[key["status"]] = row["count"]
+
+    projects = await db["projects"].find({}, {"_id": 0, "id": 1}).to_list()
+    operations = [
+        UpdateOne({"id": p["id"]}, {"$set": {"status_counts": counts.get(int(p["id"]), {})}})
+        for p in projects
+    ]
+    if operations:
+        await db["projects"].bulk_write(operations, ordered=False)
+    await db["versions"].update_one(REBUILT_MARKER, {"$set": {"rebuilt_at": utc_now()}}, upsert=True)
+    print(f"✅ Status counters rebuilt for {len(operations)} projects")
+    return len(operations)
+
+
+async def ensure_status_counts(db) -> int:
+    #rebuild when the counters were never built here or a project has none; 0 when nothing was missing
+    if (await db["versions"].find_one(REBUILT_MARKER) is not None
+            and await db["projects"].find_one({"status_counts": {"$exists": False}}, {"_id": 1}) is None):
+        return 0
+    return await repair_status_counts(db)
+
+
+if __name__ == "__main__":
+    # python -m backend.counters
+    from .db import close_db, get_async_db, init_db
+
+    async def main():
+        await init_db()
+        try:
+            await repair_status_counts(get_async_db())
+        finally:
+            await close_db()
+
+    asyncio.run(main())
@@ -1,63 +1,285 @@
 from pymongo.mongo_client import MongoClient
+from pymongo.asynchronous.mongo_client import AsyncMongoClient
 from pymongo.server_api import ServerApi
 from pymongo import ReturnDocument
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
 from datetime import datetime, timezone
+import asyncio
+import anyio
 from .config import Config
+from .metrics import command_listener, pool_listener
 
 
 mongodb_client: MongoClient | None = None
+async_mongodb_client: AsyncMongoClient | None = None
+
+
+def _client_options() -> dict:
+    client_options = {
+        "server_api": ServerApi("1"),
+        "serverSelectionTimeoutMS": Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": Config.MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": Config.MONGO_SOCKET_TIMEOUT_MS,
+        "maxPoolSize": Config.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": Config.MONGO_MIN_POOL_SIZE,
+        "maxConnecting": Config.MONGO_MAX_CONNECTING,
+        "event_listeners": [command_listener, pool_listener],
+    }
+    if Config.MONGO_MAX_IDLE_TIME_MS:
+        client_options["maxIdleTimeMS"] = Config.MONGO_MAX_IDLE_TIME_MS
+    if Config.MONGO_WAIT_QUEUE_TIMEOUT_MS:
+        client_options["waitQueueTimeoutMS"] = Config.MONGO_WAIT_QUEUE_TIMEOUT_MS
+    if Config.MONGO_COMPRESSORS:
+        #the driver skips compressors whose library is missing (with a warning) and negotiates the rest with the server
+        client_options["compressors"] = Config.MONGO_COMPRESSORS
+
+    if Config.MONGO_SSL_ENABLED:
+        client_options.update({
+            "tls": True,
+            "tlsAllowInvalidCertificates": Config.MONGO_TLS_ALLOW_INVALID_CERTIFICATES,
+        })
+
+    return client_options
 
 
 def get_mongo_client() -> MongoClient:
     global mongodb_client
 
     if mongodb_client is None:
-        client_options = {
-            "server_api": ServerApi("1"),
-            "serverSelectionTimeoutMS": 30000,
-            "connectTimeoutMS": 30000,
-            "socketTimeoutMS": 30000,
-        }
-        
-        if Config.MONGO_SSL_ENABLED:
-            client_options.update({
-                "tls": True,
-                "tlsAllowInvalidCertificates": Config.MONGO_TLS_ALLOW_INVALID_CERTIFICATES,
-            })
-        
-        mongodb_client = MongoClient(Config.DATABASE_URL, **client_options)
+        mongodb_client = MongoClient(Config.DATABASE_URL, **_client_options())
         
     return mongodb_client
 
 
+def get_async_mongo_client() -> AsyncMongoClient:
+    global async_mongodb_client
+
+    if async_mongodb_client is None:
+        async_mongodb_client = AsyncMongoClient(Config.DATABASE_URL, **_client_options())
+
+    return async_mongodb_client
+
+
 def get_db():
     client = get_mongo_client()
     return client[Config.MONGO_DB_NAME]
 
 
-def init_db() -> None:
+# Sync driver behind an awaitable interface (MONGO_ASYNC_ENABLED=false).
+# Every blocking call is pushed to the anyio threadpool so callers can be
+# written once against the AsyncDatabase API.
+
+_CURSOR_CHAIN_METHODS = {"sort", "limit", "skip", "hint", "batch_size", "max_time_ms", "max_await_time_ms", "comment"}
+
+
+class ThreadedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if not callable(attr):
+            return attr
+        if name in _CURSOR_CHAIN_METHODS:
+            def chain(*args, **kwargs):
+                attr(*args, **kwargs)
+                return self
+            return chain
+
+        async def run(*args, **kwargs):
+            return await anyio.to_thread.run_sync(lambda: attr(*args, **kwargs))
+        return run
+
+    async def to_list(self, length: int | None = None) -> list:
+        def collect():
+            if length is None:
+                return list(self._cursor)
+            return [doc for _, doc in zip(range(length), self._cursor)]
+        return await anyio.to_thread.run_sync(collect)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        sentinel = object()
+        doc = await anyio.to_thread.run_sync(next, self._cursor, sentinel)
+        if doc is sentinel:
+            raise StopAsyncIteration
+        return doc
+
+
+class ThreadedCollection:
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        async def run(*args, **kwargs):
+            return await anyio.to_thread.run_sync(lambda: attr(*args, **kwargs))
+        return run
+
+    def find(self, *args, **kwargs) -> ThreadedCursor:
+        return ThreadedCursor(self._collection.find(*args, **kwargs))
+
+    async def aggregate(self, *args, **kwargs) -> ThreadedCursor:
+        cursor = await anyio.to_thread.run_sync(lambda: self._collection.aggregate(*args, **kwargs))
+        return ThreadedCursor(cursor)
+
+    async def watch(self, *args, **kwargs) -> ThreadedCursor:
+        stream = await anyio.to_thread.run_sync(lambda: self._collection.watch(*args, **kwargs))
+        return ThreadedCursor(stream)
+
+    def with_options(self, *args, **kwargs) -> "ThreadedCollection":
+        return ThreadedCollection(self._collection.with_options(*args, **kwargs))
+
+
+class ThreadedDatabase:
+    def __init__(self, database):
+        self._database = database
+
+    def __getitem__(self, name: str) -> ThreadedCollection:
+        return ThreadedCollection(self._database[name])
+
+    def get_collection(self, name: str, **kwargs) -> ThreadedCollection:
+        return ThreadedCollection(self._database.get_collection(name, **kwargs))
+
+    def __getattr__(self, name):
+        attr = getattr(self._database, name)
+        if not callable(attr):
+            return attr
+
+        async def run(*args, **kwargs):
+            return await anyio.to_thread.run_sync(lambda: attr(*args, **kwargs))
+        return run
+
+
+def get_async_db():
+    #awaitable database handle; native async driver unless the sync path is configured
+    if Config.MONGO_ASYNC_ENABLED:
+        return get_async_mongo_client()[Config.MONGO_DB_NAME]
+    return ThreadedDatabase(get_db())
+
+
+async def init_db() -> None:
     try:
-        client = get_mongo_client()
-        client.admin.command("ping")
+        if Config.MONGO_ASYNC_ENABLED:
+            await get_async_mongo_client().admin.command("ping")
+        else:
+            await anyio.to_thread.run_sync(lambda: get_mongo_client().admin.command("ping"))
         print("✅ MongoDB connection successful")
     except Exception as e:
         print(f"❌ MongoDB connection failed: {e}")
         raise RuntimeError(f"Failed to connect to MongoDB: {e}")
 
 
-def get_database():
-    return get_db()
+async def close_db() -> None:
+    global mongodb_client, async_mongodb_client
+
+    if async_mongodb_client is not None:
+        await async_mongodb_client.close()
+        async_mongodb_client = None
+    if mongodb_client is not None:
+        mongodb_client.close()
+        mongodb_client = None
+
+
+async def get_database():
+    return get_async_db()
+
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def read_options() -> dict:
+    mode = READ_PREFERENCES.get(Config.MONGO_READ_PREFERENCE)
+    if mode is None:
+        raise ValueError(f"Unknown MONGO_READ_PREFERENCE {Config.MONGO_READ_PREFERENCE!r}, expected one of {', '.join(READ_PREFERENCES)}")
+    if mode is Primary:
+        options = {"read_preference": Primary()}
+    else:
+        options = {"read_preference": mode(max_staleness=Config.MONGO_READ_MAX_STALENESS_SECONDS or -1)}
+    if Config.MONGO_READ_CONCERN:
+        options["read_concern"] = ReadConcern(Config.MONGO_READ_CONCERN)
+    return options
+
+
+def get_async_read_db():
+    #database handle for read-only endpoints: MONGO_READ_PREFERENCE and MONGO_READ_CONCERN instead of the primary
+    options = read_options()
+    if Config.MONGO_ASYNC_ENABLED:
+        return get_async_mongo_client().get_database(Config.MONGO_DB_NAME, **options)
+    return ThreadedDatabase(get_mongo_client().get_database(Config.MONGO_DB_NAME, **options))
+
+
+async def get_read_database():
+    return get_async_read_db()
+
+
+class IdAllocator:
+    """Hi/lo id allocator over the `counters` collection.
+
+    Each process reserves ID_BLOCK_SIZE ids per counter with one atomic $inc
+    and hands them out locally, so inserts skip the counter round-trip and
+    writers stop contending on the counter document. Ids stay unique across
+    workers and increase within a process; unused ids of a block are lost on
+    restart.
+    """
+
+    def __init__(self, block_size: int):
+        self.block_size = max(1, block_size)
+        self.blocks: dict[str, tuple[int, int]] = {}  # name -> (next id, end exclusive)
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def _reserve(self, db, name: str, size: int) -> tuple[int, int]:
+        doc = await db["counters"].find_one_and_update(
+            {"_id": name},
+            {"$inc": {"seq": size}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        end = int((doc or {}).get("seq", size)) + 1
+        return end - size, end
+
+    async def allocate(self, db, name: str, count: int = 1) -> list[int]:
+        if self.block_size == 1:
+            # no local block to share: concurrent callers $inc independently, as before
+            first, end = await self._reserve(db, name, count)
+            return list(range(first, end))
+
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            ids: list[int] = []
+            next_id, end = self.blocks.get(name, (0, 0))
+            while len(ids) < count:
+                if next_id >= end:
+                    next_id, end = await self._reserve(db, name, max(self.block_size, count - len(ids)))
+                take = min(end - next_id, count - len(ids))
+                ids.extend(range(next_id, next_id + take))
+                next_id += take
+            self.blocks[name] = (next_id, end)
+            return ids
+
+
+id_allocator = IdAllocator(Config.ID_BLOCK_SIZE)
+
+
+async def get_next_sequence(db, name: str) -> int:
+    return (await id_allocator.allocate(db, name, 1))[0]
 
 
-def get_next_sequence(db, name: str) -> int:
-    doc = db["counters"].find_one_and_update(
-        {"_id": name},
-        {"$inc": {"seq": 1}},
-        upsert=True,
-        return_document=ReturnDocument.AFTER,
-    )
-    
-    return int((doc or {}).get("seq", 1))
+async def allocate_ids(db, name: str, count: int) -> list[int]:
+    #bulk variant for batch inserts; ids are consecutive unless a block boundary is crossed
+    return await id_allocator.allocate(db, name, count)
 
 
 def utc_now() -> datetime:
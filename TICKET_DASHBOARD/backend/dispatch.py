@@ -0,0 +1,118 @@
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+import asyncio
+import time
+from .config import Config
+from .metrics import register_gauge
+
+
+class ActivityEvent(NamedTuple):
+    project_id: int
+    message: str
+    actor_email: str
+    ticket_id: Optional[int]
+    enqueued_at: float
+    change_token: Optional[int] = None
+
+
+Handler = Callable[[ActivityEvent], Awaitable[None]]
+
+
+class ActivityDispatcher:
+    """Takes activity notifications off the request path.
+
+    Handlers submit() an event and return; consumer tasks run the WebSocket
+    fan-out, email recipient selection and outbox enqueue in the background.
+    """
+
+    def __init__(self):
+        self.queue: asyncio.Queue[ActivityEvent] = asyncio.Queue(maxsize=Config.DISPATCH_QUEUE_SIZE)
+        self._handler: Optional[Handler] = None
+        self._tasks: List[asyncio.Task] = []
+        self.accepting = False
+        self.dispatched = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+
+    def submit(self, project_id: int, message: str, actor_email: str, ticket_id: Optional[int] = None,
+               change_token: Optional[int] = None) -> bool:
+        if not self.accepting:
+            self.dropped += 1
+            return False
+        try:
+            self.queue.put_nowait(ActivityEvent(int(project_id), message, actor_email, ticket_id, time.monotonic(), change_token))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            print("⚠️ Activity dispatch queue full, dropping notification")
+            return False
+        return True
+
+    async def _consume(self) -> None:
+        while True:
+            event = await self.queue.get()
+            lag = time.monotonic() - event.enqueued_at
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.total_lag += lag
+            try:
+                await self._handler(event)
+                self.dispatched += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"❌ Activity dispatch failed: {e}")
+            finally:
+                self.queue.task_done()
+
+    def start(self, handler: Handler) -> None:
+        self._handler = handler
+        self.accepting = True
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._consume()) for _ in range(Config.DISPATCH_WORKERS)]
+
+    async def stop(self) -> None:
+        #stop accepting, drain what is queued (bounded by DISPATCH_DRAIN_TIMEOUT_SECONDS), then cancel
+        self.accepting = False
+        try:
+            await asyncio.wait_for(self.queue.join(), Config.DISPATCH_DRAIN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Activity dispatch drain timed out with {self.queue.qsize()} events queued")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def healthy(self) -> bool:
+        #accepting events, every consumer alive and the queue not saturated
+        workers_alive = bool(self._tasks) and all(not task.done() for task in self._tasks)
+        return self.accepting and workers_alive and not self.queue.full()
+
+    def stats(self) -> Dict[str, float]:
+        processed = self.dispatched + self.failed
+        return {
+            "queue_depth": self.queue.qsize(),
+            "dispatched": self.dispatched,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "lag_seconds_last": self.last_lag,
+            "lag_seconds_max": self.max_lag,
+            "lag_seconds_avg": self.total_lag / processed if processed else 0.0,
+        }
+
+
+activity_dispatcher: ActivityDispatcher | None = None
+
+
+def get_dispatcher() -> ActivityDispatcher:
+    global activity_dispatcher
+
+    if activity_dispatcher is None:
+        activity_dispatcher = ActivityDispatcher()
+
+    return activity_dispatcher
+
+
+register_gauge("activity_dispatch_queue_depth", "Activity events waiting for dispatch", lambda: get_dispatcher().queue.qsize())
+register_gauge("activity_dispatch_lag_seconds", "Queue lag of the last dispatched activity event", lambda: get_dispatcher().last_lag)
+register_gauge("activity_dispatch_dropped", "Activity events dropped because the queue was full", lambda: get_dispatcher().dropped)
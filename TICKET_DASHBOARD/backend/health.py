@@ -0,0 +1,117 @@
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import time
+from .config import Config
+from .db import get_async_db, init_db
+from .dispatch import get_dispatcher
+from .metrics import pool_listener
+from .pubsub import get_pubsub
+
+Job = Tuple[str, Callable[[], Awaitable[None]]]
+
+
+class DatabaseWarmup:
+    """Connects to MongoDB in the background so the app serves /health right away.
+
+    Pings every MONGO_WARMUP_RETRY_SECONDS until the server answers, then runs
+    the startup jobs (index bootstrap, counter repair, client warm-ups) in
+    order. /ready reports 503 until all of them have run.
+    """
+
+    def __init__(self):
+        self.connected = False
+        self.ready = False
+        self.attempts = 0
+        self.last_error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.ready_after: Optional[float] = None
+        self._jobs: List[Job] = []
+        self._task: asyncio.Task | None = None
+
+    def start(self, jobs: List[Job]) -> None:
+        self._jobs = jobs
+        self.started_at = time.monotonic()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            self.attempts += 1
+            try:
+                await init_db()
+                break
+            except Exception as e:
+                self.last_error = str(e)
+                await asyncio.sleep(Config.MONGO_WARMUP_RETRY_SECONDS)
+        self.connected = True
+        self.last_error = None
+
+        for name, job in self._jobs:
+            try:
+                await job()
+            except Exception as e:
+                # a failed job degrades the node but must not keep it out of rotation forever
+                print(f"⚠️ Startup job '{name}' failed: {e}")
+        self.ready = True
+        self.ready_after = time.monotonic() - self.started_at
+        print(f"✅ Warm-up finished in {self.ready_after:.2f}s")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "connected": self.connected,
+            "ready": self.ready,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "ready_after_seconds": self.ready_after,
+        }
+
+
+db_warmup: DatabaseWarmup | None = None
+
+
+def get_db_warmup() -> DatabaseWarmup:
+    global db_warmup
+
+    if db_warmup is None:
+        db_warmup = DatabaseWarmup()
+
+    return db_warmup
+
+
+async def ping_mongo() -> Tuple[bool, float, Optional[str]]:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(get_async_db().command("ping"), Config.READY_PING_TIMEOUT_SECONDS)
+        return True, time.perf_counter() - started, None
+    except Exception as e:
+        return False, time.perf_counter() - started, str(e) or type(e).__name__
+
+
+async def readiness() -> Tuple[bool, Dict]:
+    #(ready, report) for the /ready probe; pings Mongo only once the warm-up has connected
+    warmup = get_db_warmup()
+    mongo = {"ok": False, "ping_ms": None, "error": warmup.last_error}
+    if warmup.connected:
+        ok, elapsed, error = await ping_mongo()
+        mongo = {"ok": ok, "ping_ms": round(elapsed * 1000, 2), "error": error}
+
+    dispatcher = get_dispatcher()
+    dispatch = {"ok": dispatcher.healthy(), **dispatcher.stats()}
+
+    pubsub = {"ok": get_pubsub().ready, "backend": Config.PUBSUB_BACKEND}
+
+    ready = warmup.ready and mongo["ok"] and dispatch["ok"] and pubsub["ok"]
+    return ready, {
+        "status": "ready" if ready else "not_ready",
+        "warmup": warmup.stats(),
+        "mongo": mongo,
+        "pool": pool_listener.stats(),
+        "dispatcher": dispatch,
+        "pubsub": pubsub,
+    }
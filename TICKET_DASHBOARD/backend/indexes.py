@@ -0,0 +1,129 @@
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from typing import Dict, List
+from .config import Config
+
+
+# Declarative index registry: collection -> indexes that must exist.
+# Applied idempotently at startup by ensure_indexes().
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "projects": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "tickets": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("project_id", ASCENDING), ("id", ASCENDING)], name="project_id_id"),
+        IndexModel([("project_id", ASCENDING), ("change_seq", ASCENDING)], name="project_id_change_seq"),
+        # the only text index a collection may have; backs GET /api/tickets/search
+        IndexModel([("description", TEXT)], name="description_text"),
+    ],
+    "activities": [
+        # _id is the keyset tie-breaker for cursor pagination
+        IndexModel([("project_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="project_id_created_at_id"),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+    ],
+    "activity_buckets": [
+        IndexModel([("project_id", ASCENDING), ("start", DESCENDING)], name="project_id_start"),
+        IndexModel([("start", DESCENDING)], name="start"),
+        IndexModel([("end", ASCENDING)], name="end"),
+    ],
+    "last_visit": [
+        IndexModel([("user_id", ASCENDING), ("project_id", ASCENDING)], name="user_id_project_id_unique", unique=True),
+        IndexModel([("project_id", ASCENDING), ("visited_at", DESCENDING)], name="project_id_visited_at"),
+    ],
+    "user_super_toggle": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+    "email_outbox": [
+        IndexModel([("status", ASCENDING), ("send_after", ASCENDING)], name="status_send_after"),
+        IndexModel([("recipient", ASCENDING), ("project_id", ASCENDING)], name="pending_recipient_project_unique",
+                   unique=True, partialFilterExpression={"status": "pending"}),
+    ],
+    "otp_codes": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "otp_throttle": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "ws_presence": [
+        IndexModel([("updated_at", ASCENDING)], name="updated_at_ttl",
+                   expireAfterSeconds=Config.PUBSUB_PRESENCE_INTERVAL_SECONDS * 3),
+    ],
+}
+
+
+if Config.VISIT_RAW_LOG_ENABLED and Config.VISIT_RAW_LOG_TTL_DAYS > 0:
+    INDEXES["user_visits"] = [
+        IndexModel([("visited_at", ASCENDING)], name="visited_at_ttl",
+                   expireAfterSeconds=Config.VISIT_RAW_LOG_TTL_DAYS * 24 * 60 * 60),
+    ]
+
+
+async def ensure_indexes(db) -> None:
+    for collection, indexes in INDEXES.items():
+        try:
+            await db[collection].create_indexes(indexes)
+        except Exception as e:
+            # an existing conflicting index or duplicate data must not keep the API down
+            print(f"⚠️ Index creation failed on {collection}: {e}")
+
+
+# Hot queries checked by verify_query_plans(): (label, explainable command)
+HOT_QUERIES = [
+    ("tickets by project", {"find": "tickets", "filter": {"project_id": 0}, "sort": {"id": 1}}),
+    ("ticket changes", {"find": "tickets", "filter": {"project_id": 0, "change_seq": {"$gt": 0}}, "sort": {"change_seq": 1}}),
+    ("settled change token", {"find": "tickets", "filter": {"project_id": 0, "change_seq": {"$gt": 0}, "updated_at": {"$lte": 0}}, "sort": {"change_seq": -1}, "limit": 1}),
+    ("activities by project", {"find": "activities", "filter": {"project_id": 0}, "sort": {"created_at": -1, "_id": -1}, "limit": 21}),
+    ("activities feed", {"find": "activities", "filter": {}, "sort": {"created_at": -1, "_id": -1}, "limit": 21}),
+    ("project summary", {"find": "projects", "filter": {}, "sort": {"id": 1}, "projection": {"_id": 0, "id": 1, "name": 1, "status_counts": 1}}),
+    ("activity buckets by project", {"find": "activity_buckets", "filter": {"project_id": 0}, "sort": {"start": -1}}),
+    ("activity buckets feed", {"find": "activity_buckets", "filter": {}, "sort": {"start": -1}}),
+    ("activity buckets of a period", {"find": "activity_buckets", "filter": {"project_id": 0, "start": 0}}),
+    ("activity buckets of a period feed", {"find": "activity_buckets", "filter": {"start": 0}}),
+    ("users by id", {"find": "users", "filter": {"id": 0}}),
+    ("users by email", {"find": "users", "filter": {"email": ""}}),
+    ("recent project visitors", {"find": "last_visit", "filter": {"project_id": 0}, "sort": {"visited_at": -1}, "limit": 100}),
+]
+
+
+def _plan_stages(plan) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        for key, value in plan.items():
+            if key == "rejectedPlans":
+                continue
+            if key == "stage" and isinstance(value, str):
+                stages.append(value)
+            else:
+                stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def verify_query_plans(db) -> List[str]:
+    #explain() the hot queries and warn for any that fall back to a collection scan
+    collscans = []
+    for label, query in HOT_QUERIES:
+        try:
+            explained = await db.command({"explain": query, "verbosity": "queryPlanner"})
+        except Exception as e:
+            print(f"⚠️ Could not explain '{label}': {e}")
+            continue
+
+        if "COLLSCAN" in _plan_stages(explained):
+            collscans.append(label)
+            print(f"⚠️ Query '{label}' uses COLLSCAN")
+
+    return collscans
+
+
+async def bootstrap_indexes(db) -> None:
+    if Config.MONGO_ENSURE_INDEXES:
+        await ensure_indexes(db)
+    if Config.MONGO_VERIFY_QUERY_PLANS:
+        await verify_query_plans(db)
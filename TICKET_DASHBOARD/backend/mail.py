@@ -1,16 +1,58 @@
-import resend
+import anyio
 from .config import Config
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 
 BASE_DIR = Path(__file__).resolve().parent
 
-resend.api_key = Config.MAIL_PASSWORD.get_secret_value()
+
+class ResendTransport:
+    name = "resend"
+
+    def __init__(self):
+        # imported on first use: the SDK and its HTTP stack cost ~70 ms of import time on nodes that never send mail
+        import resend
+
+        resend.api_key = Config.MAIL_PASSWORD.get_secret_value()
+        self._resend = resend
+
+    def send(self, message: Dict) -> Dict:
+        # blocking HTTP round-trip, always called from a worker thread
+        return self._resend.Emails.send(message)
+
+
+class LocalTransport:
+    """Stand-in transport for tests and benchmarks: keeps messages in memory."""
+
+    name = "local"
+
+    def __init__(self):
+        self.sent: List[Dict] = []
+
+    def send(self, message: Dict) -> Dict:
+        self.sent.append(message)
+        return {"id": f"local-{len(self.sent)}"}
+
+
+mail_transport: ResendTransport | LocalTransport | None = None
+
+
+def get_mail_transport():
+    global mail_transport
+
+    if mail_transport is None:
+        if Config.MAIL_TRANSPORT == "local":
+            mail_transport = LocalTransport()
+        else:
+            mail_transport = ResendTransport()
+
+    return mail_transport
 
 
 async def send_html_email(recipients: List[str], subject: str, body: str):
+    transport = get_mail_transport()
     try:
-        response = resend.Emails.send({
+        response = await anyio.to_thread.run_sync(transport.send, {
             "from": Config.MAIL_FROM,
             "to": recipients,
             "subject": subject,
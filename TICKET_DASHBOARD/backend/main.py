@@ -1,20 +1,60 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+import anyio
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
-from .db import init_db
+from .db import close_db, get_async_db, read_options
+from .health import get_db_warmup, readiness
+from .mail import get_mail_transport
+from .indexes import bootstrap_indexes
+from .counters import ensure_status_counts, repair_status_counts
+from .activities import get_activity_retention
 from .auth import router as auth_router
 from .routes import router as api_router
-from .ws import router as ws_router, broadcast
+from .ws import router as ws_router, start_fanout, stop_fanout
+from .visits import get_visit_buffer
+from .outbox import get_email_outbox
+from .dispatch import get_dispatcher
+from .notifications import deliver_activity
+from .pagination import NEXT_CURSOR_HEADER
+from .versions import CHANGE_TOKEN_HEADER
+from .responses import FastJSONResponse
+from .metrics import MetricsMiddleware, render as render_metrics
+from .config import Config
+
+
+def startup_jobs():
+    #run by the background warm-up once Mongo answers, so none of them delays startup
+    jobs = [("indexes", lambda: bootstrap_indexes(get_async_db()))]
+    if Config.STATUS_COUNTS_REPAIR_ON_STARTUP:
+        jobs.append(("status counters", lambda: repair_status_counts(get_async_db())))
+    else:
+        jobs.append(("status counters", lambda: ensure_status_counts(get_async_db())))
+    jobs.append(("mail transport", lambda: anyio.to_thread.run_sync(get_mail_transport)))
+    return jobs
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_db()
+    read_options()  #fail fast on an unknown MONGO_READ_PREFERENCE instead of on the first read request
+    get_db_warmup().start(startup_jobs())
+    await start_fanout()
+    get_visit_buffer().start()
+    get_email_outbox().start()
+    get_dispatcher().start(deliver_activity)
+    get_activity_retention().start()
     yield
+    await get_activity_retention().stop()
+    await get_db_warmup().stop()
+    await get_dispatcher().stop()
+    await get_email_outbox().stop()
+    await get_visit_buffer().stop()
+    await stop_fanout()
+    await close_db()
 
 
-app = FastAPI(title="Ticket Dashboard API", lifespan=lifespan)
+app = FastAPI(title="Ticket Dashboard API", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,7 +62,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, CHANGE_TOKEN_HEADER, "ETag"],
 )
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/")
 async def health_check():
@@ -31,9 +73,22 @@ async def health_check():
 
 @app.get("/health")
 async def health():
-    """Additional health check endpoint"""
+    """Liveness probe: answers from memory without touching Mongo"""
     return {"status": "ok"}
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe: Mongo connectivity, connection pool and dispatcher health; 503 until ready"""
+    is_ready, report = await readiness()
+    return FastJSONResponse(report, status_code=200 if is_ready else 503)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus metrics; requires 'Bearer <METRICS_TOKEN>' when METRICS_TOKEN is set"""
+    if Config.METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {Config.METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 app.include_router(auth_router)
 app.include_router(api_router)
 app.include_router(ws_router)
\ No newline at end of file
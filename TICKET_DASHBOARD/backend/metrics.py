@@ -0,0 +1,231 @@
+from typing import Callable, Dict, Iterable, List, Tuple
+from bisect import bisect_left
+from pymongo import monitoring
+import time
+
+# Latency buckets in seconds, shared by every histogram
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names: Tuple[str, ...], values: Tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Histogram:
+    """Prometheus-style histogram; observe() is a bisect and a few list increments."""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.series: Dict[Tuple, List] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, labels: Tuple, value: float) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(BUCKETS) + 2)
+        index = bisect_left(BUCKETS, value)
+        if index < len(BUCKETS):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in self.series.items():
+            base = _labels(self.labelnames, labels)
+            cumulative = 0
+            for bound, count in zip(BUCKETS, series):
+                cumulative += count
+                yield f'{self.name}_bucket{_with_le(base, str(bound))} {cumulative}'
+            yield f'{self.name}_bucket{_with_le(base, "+Inf")} {series[-1]}'
+            yield f"{self.name}_sum{base} {series[-2]}"
+            yield f"{self.name}_count{base} {series[-1]}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.series: Dict[Tuple, float] = {}
+
+    def inc(self, labels: Tuple = (), amount: float = 1) -> None:
+        self.series[labels] = self.series.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self.series.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value}"
+
+
+def _with_le(base: str, bound: str) -> str:
+    if not base:
+        return '{le="' + bound + '"}'
+    return base[:-1] + ',le="' + bound + '"}'
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status"))
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ("command", "collection"))
+MONGO_COMMAND_FAILURES = Counter(
+    "mongo_command_failures_total", "Failed MongoDB commands", ("command", "collection"))
+WS_BROADCAST_SECONDS = Histogram(
+    "ws_broadcast_duration_seconds", "Time to fan an event out to local WebSocket queues")
+WS_FRAMES_SENT = Counter("ws_frames_sent_total", "WebSocket frames sent", ("encoding",))
+WS_EVENTS_SENT = Counter("ws_events_sent_total", "Events sent over WebSockets, several per coalesced frame", ("encoding",))
+WS_BYTES_SENT = Counter("ws_bytes_sent_total", "WebSocket payload bytes sent, after compression", ("encoding",))
+
+# name -> callable returning the gauge value, read at scrape time
+gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+
+def register_gauge(name: str, help: str, read: Callable[[], float]) -> None:
+    gauges[name] = (help, read)
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in (HTTP_REQUEST_SECONDS, MONGO_COMMAND_SECONDS, MONGO_COMMAND_FAILURES, WS_BROADCAST_SECONDS,
+                   WS_FRAMES_SENT, WS_EVENTS_SENT, WS_BYTES_SENT):
+        lines.extend(metric.render())
+    for name, (help, read) in gauges.items():
+        try:
+            value = float(read())
+        except Exception:
+            continue
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Pure ASGI timing middleware; labels requests by route template, not raw path."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                (scope["method"], getattr(route, "path", "unmatched"), status),
+                time.perf_counter() - started,
+            )
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Per-command and per-collection MongoDB latency, from driver monitoring events."""
+
+    def __init__(self):
+        self._collections: Dict[Tuple, str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        target = event.command.get(event.command_name)
+        self._collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else ""
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_COMMAND_SECONDS.observe((event.command_name, collection), event.duration_micros / 1_000_000)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_COMMAND_SECONDS.observe((event.command_name, collection), event.duration_micros / 1_000_000)
+        MONGO_COMMAND_FAILURES.inc((event.command_name, collection))
+
+
+command_listener = CommandMetricsListener()
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Connection pool state per server, from driver CMAP events (both clients report here)."""
+
+    def __init__(self):
+        self.pools: Dict[str, Dict[str, int]] = {}
+
+    def _pool(self, address) -> Dict[str, int]:
+        key = f"{address[0]}:{address[1]}"
+        pool = self.pools.get(key)
+        if pool is None:
+            pool = self.pools[key] = {"open": 0, "checked_out": 0, "created": 0, "closed": 0,
+                                      "checkout_failures": 0, "cleared": 0, "ready": 0}
+        return pool
+
+    def pool_created(self, event) -> None:
+        self._pool(event.address)
+
+    def pool_ready(self, event) -> None:
+        self._pool(event.address)["ready"] = 1
+
+    def pool_cleared(self, event) -> None:
+        pool = self._pool(event.address)
+        pool["cleared"] += 1
+        pool["ready"] = 0
+
+    def pool_closed(self, event) -> None:
+        self.pools.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_created(self, event) -> None:
+        pool = self._pool(event.address)
+        pool["open"] += 1
+        pool["created"] += 1
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        pool = self._pool(event.address)
+        pool["open"] = max(0, pool["open"] - 1)
+        pool["closed"] += 1
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+    def connection_check_out_failed(self, event) -> None:
+        self._pool(event.address)["checkout_failures"] += 1
+
+    def connection_checked_out(self, event) -> None:
+        self._pool(event.address)["checked_out"] += 1
+
+    def connection_checked_in(self, event) -> None:
+        pool = self._pool(event.address)
+        pool["checked_out"] = max(0, pool["checked_out"] - 1)
+
+    def totals(self) -> Dict[str, int]:
+        totals: Dict[str, int] = {}
+        for pool in self.pools.values():
+            for name, value in pool.items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def stats(self) -> Dict:
+        return {"servers": {address: dict(pool) for address, pool in self.pools.items()}, "totals": self.totals()}
+
+
+pool_listener = PoolStatsListener()
+
+for _stat, _help in (("open", "Open MongoDB connections"), ("checked_out", "MongoDB connections in use"),
+                     ("checkout_failures", "Failed MongoDB connection checkouts")):
+    register_gauge(f"mongo_pool_{_stat}", _help, lambda stat=_stat: pool_listener.totals().get(stat, 0))
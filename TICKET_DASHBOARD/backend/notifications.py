@@ -1,41 +1,44 @@
-from .ws import broadcast, get_online_user_ids
+from .ws import broadcast, is_user_online
 from typing import Optional, List
-from .mail import send_activity_email
+from .outbox import get_email_outbox
+from .dispatch import ActivityEvent, get_dispatcher
+from .db import get_async_db
 import json
-import anyio
 
 
-async def send_websocket_notification(project_id: int, message: str, ticket_id: Optional[int] = None):
-    #WebSocket notification to all connected users
+async def send_websocket_notification(project_id: int, message: str, ticket_id: Optional[int] = None,
+                                      change_token: Optional[int] = None):
+    #WebSocket notification to the users subscribed to this project
     data = {"project_id": int(project_id), "message": message}
     
     if ticket_id is not None:
         data["ticket_id"] = int(ticket_id)
 
+    #clients holding an older token fetch GET /api/projects/{id}/changes?since=<their token>
+    if change_token is not None:
+        data["change_token"] = int(change_token)
+
     ws_message = json.dumps({"event": "activity", "data": data})
-    await broadcast(ws_message)
+    await broadcast(ws_message, project_id=int(project_id))
 
 
-def find_recent_project_users(db, project_id: int) -> List[int]:
-    
-    pipeline = [
-        {"$match": {"project_id": int(project_id)}},
-        {"$sort": {"visited_at": -1}},
-        {"$group": {"_id": "$user_id", "last": {"$first": "$visited_at"}}},
-        {"$limit": 100},
-    ]
-    return [int(doc["_id"]) for doc in db["user_visits"].aggregate(pipeline)]
+async def find_recent_project_users(db, project_id: int) -> List[int]:
+    #indexed range read over last_visit (project_id, visited_at desc)
+    cursor = db["last_visit"].find(
+        {"project_id": int(project_id)},
+        {"_id": 0, "user_id": 1},
+    ).sort("visited_at", -1).limit(100)
+    return [int(doc["user_id"]) async for doc in cursor]
 
 
 async def send_email_notification(db, project_id: int, message: str, actor_email: str):
     #Send email to offline users who recently visited this project#
     try:
-        user_ids = find_recent_project_users(db, int(project_id))
+        user_ids = await find_recent_project_users(db, int(project_id))
         if not user_ids:
             return
 
-        users = list(db["users"].find({"id": {"$in": user_ids}}, {"_id": 0}))
-        online_user_ids = get_online_user_ids()
+        users = await db["users"].find({"id": {"$in": user_ids}}, {"_id": 0}).to_list()
         recipients = []
 
         for user in users:
@@ -43,28 +46,33 @@ async def send_email_notification(db, project_id: int, message: str, actor_email
             user_email = user.get("email")
             # Send email if: user exists, is offline, has email not same as the actor
             if (user_id is not None and 
-                int(user_id) not in online_user_ids and 
+                not is_user_online(int(user_id)) and 
                 user_email and 
                 user_email != actor_email):
                 recipients.append(user_email)
 
         if recipients:
-            subject = f"Activity on Project #{int(project_id)}"
-            body = f"<p>{message}</p>"
-            await send_activity_email(recipients, subject, body)
+            # coalesced per recipient and project into digest emails by the outbox workers
+            await get_email_outbox().enqueue(recipients, int(project_id), message)
 
-    except Exception:
-        pass
+    except Exception as e:
+        print(f"❌ Failed to queue email notification for project {project_id}: {e}")
 
 
-def notify_activity(db, project_id: int, message: str, actor_email: str, ticket_id: Optional[int] = None):
-    #sends both WebSocket and Email notifications
+async def deliver_activity(event: ActivityEvent):
+    #sends both WebSocket and Email notifications, run by the dispatcher consumers
     try:
-        anyio.from_thread.run(send_websocket_notification, int(project_id), message, ticket_id)
+        await send_websocket_notification(event.project_id, event.message, event.ticket_id, event.change_token)
     except Exception:
         pass
 
     try:
-        anyio.from_thread.run(send_email_notification, db, int(project_id), message, actor_email)
+        await send_email_notification(get_async_db(), event.project_id, event.message, event.actor_email)
     except Exception:
-        pass
\ No newline at end of file
+        pass
+
+
+def notify_activity(db, project_id: int, message: str, actor_email: str, ticket_id: Optional[int] = None,
+                    change_token: Optional[int] = None):
+    #queue the notification and return immediately; see deliver_activity
+    get_dispatcher().submit(int(project_id), message, actor_email, ticket_id, change_token)
@@ -0,0 +1,119 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+from datetime import timedelta
+from pymongo import ReturnDocument
+import heapq
+import hmac
+import time
+from .config import Config
+from .db import get_async_db, utc_now
+
+
+class OTPStore(ABC):
+    """One-time codes keyed by email, plus fixed-window request throttling."""
+
+    @abstractmethod
+    async def put(self, email: str, code: str, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def consume(self, email: str, code: str) -> bool:
+        #True and delete the code when it matches and has not expired
+        ...
+
+    @abstractmethod
+    async def hit(self, key: str, limit: int, window: float) -> bool:
+        #count one request for key in the current window; False once limit is exceeded
+        ...
+
+
+class MemoryOTPStore(OTPStore):
+    """Single-process store; expired codes and throttle windows are evicted via min-heaps."""
+
+    def __init__(self):
+        self.codes: Dict[str, Tuple[str, float]] = {}
+        self.counters: Dict[str, Tuple[float, int]] = {}
+        self._code_expiry: List[Tuple[float, str]] = []
+        self._counter_expiry: List[Tuple[float, str]] = []
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        while self._code_expiry and self._code_expiry[0][0] <= now:
+            expires_at, email = heapq.heappop(self._code_expiry)
+            entry = self.codes.get(email)
+            if entry is not None and entry[1] == expires_at:
+                del self.codes[email]
+        while self._counter_expiry and self._counter_expiry[0][0] <= now:
+            window_end, key = heapq.heappop(self._counter_expiry)
+            entry = self.counters.get(key)
+            if entry is not None and entry[0] == window_end:
+                del self.counters[key]
+
+    async def put(self, email: str, code: str, ttl: float) -> None:
+        self._evict()
+        expires_at = time.monotonic() + ttl
+        self.codes[email] = (code, expires_at)
+        heapq.heappush(self._code_expiry, (expires_at, email))
+
+    async def consume(self, email: str, code: str) -> bool:
+        self._evict()
+        entry = self.codes.get(email)
+        if entry is None or entry[1] <= time.monotonic() or not hmac.compare_digest(entry[0].encode(), code.encode()):
+            return False
+        del self.codes[email]
+        return True
+
+    async def hit(self, key: str, limit: int, window: float) -> bool:
+        self._evict()
+        window_end, count = self.counters.get(key, (0.0, 0))
+        if window_end <= time.monotonic():
+            window_end, count = time.monotonic() + window, 0
+            heapq.heappush(self._counter_expiry, (window_end, key))
+        self.counters[key] = (window_end, count + 1)
+        return count + 1 <= limit
+
+
+class MongoOTPStore(OTPStore):
+    """Multi-worker store: `otp_codes` and `otp_throttle`, both expired by TTL indexes."""
+
+    async def put(self, email: str, code: str, ttl: float) -> None:
+        await get_async_db()["otp_codes"].replace_one(
+            {"_id": email},
+            {"code": code, "expires_at": utc_now() + timedelta(seconds=ttl)},
+            upsert=True,
+        )
+
+    async def consume(self, email: str, code: str) -> bool:
+        # atomic check-and-delete so a code can only be used once across workers
+        doc = await get_async_db()["otp_codes"].find_one_and_delete(
+            {"_id": email, "code": code, "expires_at": {"$gt": utc_now()}},
+        )
+        return doc is not None
+
+    async def hit(self, key: str, limit: int, window: float) -> bool:
+        window_index = int(time.time() // window)
+        doc = await get_async_db()["otp_throttle"].find_one_and_update(
+            {"_id": f"{key}:{window_index}"},
+            {
+                "$inc": {"count": 1},
+                "$setOnInsert": {"expires_at": utc_now() + timedelta(seconds=window)},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return int(doc["count"]) <= limit
+
+
+otp_store: OTPStore | None = None
+
+
+def get_otp_store() -> OTPStore:
+    global otp_store
+
+    if otp_store is None:
+        if Config.OTP_STORE == "mongo":
+            otp_store = MongoOTPStore()
+        else:
+            otp_store = MemoryOTPStore()
+
+    return otp_store
@@ -0,0 +1,171 @@
+from typing import Dict, List
+from datetime import timedelta
+from html import escape
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+import asyncio
+import time
+from .config import Config
+from .db import get_async_db, utc_now
+from .mail import get_mail_transport, send_html_email
+
+
+class RateLimiter:
+    """Token bucket shared by the outbox workers of one mail provider."""
+
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class EmailOutbox:
+    """Persistent activity-email outbox backed by the `email_outbox` collection.
+
+    Activities for the same (recipient, project_id) are coalesced into one
+    pending digest until its `send_after` (now + OUTBOX_COALESCE_SECONDS).
+    Workers claim due digests in batches, send them off the event loop under
+    a per-provider rate limit and retry failures with exponential backoff.
+    """
+
+    collection = "email_outbox"
+    # a duplicate-key race resolves on the next pass, a few passes cover heavy contention
+    enqueue_attempts = 3
+
+    def __init__(self):
+        self._tasks: List[asyncio.Task] = []
+        self._limiters: Dict[str, RateLimiter] = {}
+
+    async def enqueue(self, recipients: List[str], project_id: int, message: str) -> None:
+        db = get_async_db()
+        now = utc_now()
+        update = {
+            "$push": {"messages": message},
+            "$setOnInsert": {
+                "send_after": now + timedelta(seconds=Config.OUTBOX_COALESCE_SECONDS),
+                "attempts": 0,
+                "created_at": now,
+            },
+        }
+        pending = list(recipients)
+        for _ in range(self.enqueue_attempts):
+            try:
+                await db[self.collection].bulk_write([
+                    UpdateOne({"recipient": recipient, "project_id": int(project_id), "status": "pending"}, update,
+                              upsert=True)
+                    for recipient in pending
+                ], ordered=False)
+                return
+            except BulkWriteError as e:
+                # another worker inserted the same pending digest first; the retry finds it and appends
+                errors = e.details.get("writeErrors", [])
+                if any(error.get("code") != 11000 for error in errors):
+                    raise
+                pending = [pending[error["index"]] for error in errors]
+        raise RuntimeError(f"Could not queue digest for {len(pending)} recipient(s) of project {project_id}")
+
+    async def claim_batch(self) -> List[dict]:
+        db = get_async_db()
+        batch = []
+        for _ in range(Config.OUTBOX_BATCH_SIZE):
+            now = utc_now()
+            doc = await db[self.collection].find_one_and_update(
+                {"$or": [
+                    {"status": "pending", "send_after": {"$lte": now}},
+                    # a worker died mid-send; hand the digest to someone else
+                    {"status": "sending", "claimed_at": {"$lte": now - timedelta(seconds=Config.OUTBOX_CLAIM_TIMEOUT_SECONDS)}},
+                ]},
+                {"$set": {"status": "sending", "claimed_at": now}},
+                sort=[("send_after", 1)],
+                return_document=ReturnDocument.AFTER,
+            )
+            if doc is None:
+                break
+            batch.append(doc)
+        return batch
+
+    def _limiter(self) -> RateLimiter:
+        name = get_mail_transport().name
+        if name not in self._limiters:
+            self._limiters[name] = RateLimiter(Config.OUTBOX_RATE_PER_SECOND, Config.OUTBOX_RATE_BURST)
+        return self._limiters[name]
+
+    async def deliver(self, doc: dict) -> None:
+        db = get_async_db()
+        project_id = int(doc["project_id"])
+        messages = doc.get("messages", [])
+        if len(messages) == 1:
+            subject = f"Activity on Project #{project_id}"
+            body = f"<p>{escape(messages[0])}</p>"
+        else:
+            subject = f"{len(messages)} updates on Project #{project_id}"
+            body = "<ul>" + "".join(f"<li>{escape(message)}</li>" for message in messages) + "</ul>"
+
+        try:
+            await self._limiter().acquire()
+            await send_html_email([doc["recipient"]], subject, body)
+            await db[self.collection].delete_one({"_id": doc["_id"]})
+        except Exception as e:
+            attempts = int(doc.get("attempts", 0)) + 1
+            if attempts >= Config.OUTBOX_MAX_ATTEMPTS:
+                update = {"status": "failed", "attempts": attempts, "last_error": str(e)}
+            else:
+                backoff = Config.OUTBOX_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+                update = {
+                    "status": "pending",
+                    "attempts": attempts,
+                    "last_error": str(e),
+                    "send_after": utc_now() + timedelta(seconds=backoff),
+                }
+            try:
+                await db[self.collection].update_one({"_id": doc["_id"]}, {"$set": update})
+            except Exception:
+                pass
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                batch = await self.claim_batch()
+                if batch:
+                    await asyncio.gather(*(self.deliver(doc) for doc in batch))
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Email outbox worker error: {e}")
+            await asyncio.sleep(Config.OUTBOX_POLL_SECONDS)
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(Config.OUTBOX_WORKERS)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+email_outbox: EmailOutbox | None = None
+
+
+def get_email_outbox() -> EmailOutbox:
+    global email_outbox
+
+    if email_outbox is None:
+        email_outbox = EmailOutbox()
+
+    return email_outbox
@@ -0,0 +1,132 @@
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+from datetime import datetime
+from bson import ObjectId
+import base64
+import json
+from .config import Config
+from .responses import dumps
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def encode_cursor(values: dict) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page_limit(page_size: Optional[int]) -> Optional[int]:
+    if page_size is None:
+        return None
+    if page_size < 1:
+        raise HTTPException(status_code=400, detail="page_size must be positive")
+    return min(int(page_size), Config.MAX_PAGE_SIZE)
+
+
+def projection(fields: Optional[str], required: Iterable[str] = ()) -> dict:
+    #fields=id,status -> {"_id": 0, "id": 1, "status": 1}; keyset fields are always kept
+    if not fields:
+        return {"_id": 0}
+    selected = {name.strip() for name in fields.split(",") if name.strip()}
+    selected.update(required)
+    selected.discard("_id")
+    return {"_id": 0, **{name: 1 for name in sorted(selected)}}
+
+
+# Keyset on the integer `id` (projects, tickets): ascending, cursor = last id seen
+
+def id_page_filter(base: dict, cursor: Optional[str]) -> dict:
+    if not cursor:
+        return base
+    last = decode_cursor(cursor).get("id")
+    if not isinstance(last, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {**base, "id": {"$gt": last}}
+
+
+def id_cursor(doc: dict) -> str:
+    return encode_cursor({"id": doc["id"]})
+
+
+# Keyset on (score desc, id asc) for text search results
+
+def search_page_filter(cursor: Optional[str]) -> Optional[dict]:
+    if not cursor:
+        return None
+    values = decode_cursor(cursor)
+    score, last = values.get("s"), values.get("id")
+    if not isinstance(score, (int, float)) or not isinstance(last, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"$or": [{"score": {"$lt": score}}, {"score": score, "id": {"$gt": last}}]}
+
+
+def search_cursor(doc: dict) -> str:
+    return encode_cursor({"s": doc["score"], "id": doc["id"]})
+
+
+# Keyset on (created_at desc, _id desc) for activities, which have no integer id
+
+def parse_activity_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    values = decode_cursor(cursor)
+    try:
+        return datetime.fromisoformat(values["t"]), ObjectId(values["o"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def activity_page_filter(base: dict, cursor: Optional[str]) -> dict:
+    if not cursor:
+        return base
+    created_at, oid = parse_activity_cursor(cursor)
+    return {**base, "$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": oid}},
+    ]}
+
+
+def activity_cursor(doc: dict) -> str:
+    return encode_cursor({"t": doc["created_at"].isoformat(), "o": str(doc["_id"])})
+
+
+def split_page(items: List[dict], limit: Optional[int]) -> Tuple[List[dict], bool]:
+    #queries fetch limit + 1 rows; the extra row only signals that another page exists
+    if limit is not None and len(items) > limit:
+        return items[:limit], True
+    return items, False
+
+
+def wants_ndjson(request: Request, format: Optional[str]) -> bool:
+    if format:
+        return format == "ndjson"
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_line(doc: dict) -> bytes:
+    return dumps(doc) + b"\n"
+
+
+def ndjson_response(lines: AsyncIterator[bytes], headers: Optional[dict] = None) -> StreamingResponse:
+    return StreamingResponse(lines, media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+
+async def stream_page(cursor, limit: Optional[int], make_cursor, strip_id: bool = False) -> AsyncIterator[bytes]:
+    #yield documents straight from the Mongo cursor; a full page ends with a {"next_cursor": ...} line
+    count = 0
+    last = None
+    async for doc in cursor:
+        if limit is not None and count == limit:
+            yield ndjson_line({"next_cursor": make_cursor(last)})
+            return
+        last = doc
+        count += 1
+        yield ndjson_line({k: v for k, v in doc.items() if k != "_id"} if strip_id else doc)
@@ -0,0 +1,211 @@
+from abc import ABC, abstractmethod
+from typing import AbstractSet, Awaitable, Callable, Optional, Set
+from pymongo.errors import OperationFailure
+from datetime import timedelta
+import asyncio
+import uuid
+from .config import Config
+from .db import get_async_db, utc_now
+
+# deliver(message, project_id) pushes an event to this node's own sockets
+Deliver = Callable[[str, Optional[int]], Awaitable[None]]
+LocalPresence = Callable[[], AbstractSet[int]]
+
+
+class PubSubBackend(ABC):
+    """Cluster-wide activity fan-out and presence; every node keeps its local send path."""
+
+    def __init__(self):
+        self.node_id = uuid.uuid4().hex
+        self._deliver: Optional[Deliver] = None
+        self._local_presence: LocalPresence = set
+        # False while cross-node delivery is not set up yet; reported by /ready
+        self.ready = True
+
+    async def start(self, deliver: Deliver, local_presence: LocalPresence) -> None:
+        self._deliver = deliver
+        self._local_presence = local_presence
+
+    async def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    async def publish(self, message: str, project_id: Optional[int]) -> None:
+        ...
+
+    def online_user_ids(self) -> Set[int]:
+        return set(self._local_presence())
+
+    def is_online(self, user_id: int) -> bool:
+        return user_id in self._local_presence()
+
+
+class InProcessPubSub(PubSubBackend):
+    """Single-process deployments: publishing is a direct local delivery."""
+
+    async def publish(self, message: str, project_id: Optional[int]) -> None:
+        if self._deliver is not None:
+            await self._deliver(message, project_id)
+
+
+class MongoPubSub(PubSubBackend):
+    """Multi-worker / multi-node fan-out through a change stream on a capped collection.
+
+    Events are delivered locally first, then appended to `ws_events`; every
+    other node watches the collection's inserts and delivers them to its own
+    sockets, resuming after the last seen event by its resume token (change
+    streams need a replica set, as on Atlas).
+    Presence is a heartbeated document per node in `ws_presence` (expired by
+    a TTL index), unioned into a cached cluster-wide online set. Setup runs in
+    the background and retries until Mongo answers, so startup never waits.
+    """
+
+    events_collection = "ws_events"
+    presence_collection = "ws_presence"
+
+    def __init__(self):
+        super().__init__()
+        self._tasks: list[asyncio.Task] = []
+        self._cluster_online: Set[int] = set()
+        self.ready = False
+
+    async def start(self, deliver: Deliver, local_presence: LocalPresence) -> None:
+        await super().start(deliver, local_presence)
+        self._tasks = [
+            asyncio.create_task(self._run()),
+            asyncio.create_task(self._heartbeat()),
+        ]
+
+    async def _setup(self):
+        #capped collection and a change stream opened at "now", so a restart does not replay history
+        db = get_async_db()
+        try:
+            await db.create_collection(self.events_collection, capped=True, size=Config.PUBSUB_CAPPED_SIZE_BYTES)
+        except Exception:
+            pass  # already exists
+        return await self._watch(None)
+
+    async def _watch(self, resume_token):
+        # inserts only, resumed after the last event seen; the server orders them by oplog position
+        return await get_async_db()[self.events_collection].watch(
+            [{"$match": {"operationType": "insert"}}],
+            resume_after=resume_token,
+            max_await_time_ms=1000,
+        )
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                stream = await self._setup()
+                break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Activity event fan-out setup failed, retrying: {e}")
+            await asyncio.sleep(Config.PUBSUB_RETRY_SECONDS)
+        self.ready = True
+        await self._tail(stream)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            await get_async_db()[self.presence_collection].delete_one({"_id": self.node_id})
+        except Exception:
+            pass
+
+    async def publish(self, message: str, project_id: Optional[int]) -> None:
+        if self._deliver is not None:
+            await self._deliver(message, project_id)
+        try:
+            await get_async_db()[self.events_collection].insert_one({
+                "node": self.node_id,
+                "project_id": project_id,
+                "message": message,
+                "created_at": utc_now(),
+            })
+        except Exception as e:
+            print(f"❌ Failed to publish activity event: {e}")
+
+    async def _tail(self, stream) -> None:
+        #one stream stays open; after an error it is reopened after the last event this node saw
+        resume_token = stream.resume_token
+        while True:
+            try:
+                while stream.alive:
+                    change = await stream.try_next()
+                    resume_token = stream.resume_token
+                    if change is None:
+                        continue
+                    doc = change["fullDocument"]
+                    if doc.get("node") == self.node_id:
+                        continue
+                    if self._deliver is not None:
+                        await self._deliver(doc["message"], doc.get("project_id"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Activity event tailing interrupted: {e}")
+            finally:
+                try:
+                    await stream.close()
+                except Exception:
+                    pass
+
+            while True:
+                await asyncio.sleep(Config.PUBSUB_RETRY_SECONDS)
+                try:
+                    stream = await self._watch(resume_token)
+                    break
+                except asyncio.CancelledError:
+                    raise
+                except OperationFailure as e:
+                    # the token is unusable (oplog rolled past it, or the collection was dropped)
+                    print(f"⚠️ Activity events were missed while tailing was down, resuming from now: {e}")
+                    resume_token = None
+                except Exception as e:
+                    print(f"⚠️ Activity event tailing could not resume, retrying: {e}")
+
+    async def _heartbeat(self) -> None:
+        presence = get_async_db()[self.presence_collection]
+        while True:
+            try:
+                now = utc_now()
+                await presence.update_one(
+                    {"_id": self.node_id},
+                    {"$set": {"user_ids": sorted(self._local_presence()), "updated_at": now}},
+                    upsert=True,
+                )
+                fresh_after = now - timedelta(seconds=Config.PUBSUB_PRESENCE_INTERVAL_SECONDS * 3)
+                online: Set[int] = set()
+                async for doc in presence.find({"updated_at": {"$gt": fresh_after}}, {"user_ids": 1}):
+                    online.update(int(uid) for uid in doc.get("user_ids", []))
+                self._cluster_online = online
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Presence heartbeat failed: {e}")
+            await asyncio.sleep(Config.PUBSUB_PRESENCE_INTERVAL_SECONDS)
+
+    def online_user_ids(self) -> Set[int]:
+        return self._cluster_online | set(self._local_presence())
+
+    def is_online(self, user_id: int) -> bool:
+        return user_id in self._local_presence() or user_id in self._cluster_online
+
+
+pubsub_backend: PubSubBackend | None = None
+
+
+def get_pubsub() -> PubSubBackend:
+    global pubsub_backend
+
+    if pubsub_backend is None:
+        if Config.PUBSUB_BACKEND == "mongo":
+            pubsub_backend = MongoPubSub()
+        else:
+            pubsub_backend = InProcessPubSub()
+
+    return pubsub_backend
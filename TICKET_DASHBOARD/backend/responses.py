@@ -0,0 +1,27 @@
+from fastapi.responses import JSONResponse
+from bson import ObjectId
+from typing import Any
+import orjson
+
+
+def _default(value: Any):
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    #orjson serializes datetimes (naive BSON dates and aware ones) natively
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson-backed response for raw Mongo documents.
+
+    Handlers that return this directly skip FastAPI's jsonable_encoder and
+    response_model validation; the declared response_model still documents
+    the shape in OpenAPI.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,33 +1,105 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.encoders import jsonable_encoder
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pymongo import ReturnDocument
 from .auth import get_current_user
-from .db import get_database, get_next_sequence, utc_now
+from .cache import TTLCache
+from .metrics import pool_listener, register_gauge
+from .counters import status_count_inc
+from .activities import bucketed, iterate, read_bucket_page, record_activities, record_activity
+from .db import allocate_ids, get_database, get_next_sequence, get_read_database, utc_now
 from .config import Config
-from .schemas import ProjectCreate, TicketCreate, TicketUpdate, SuperToggleRequest
-from fastapi.responses import JSONResponse
+from .schemas import (
+    ProjectCreate, TicketCreate, TicketUpdate, SuperToggleRequest,
+    ActivityOut, ProjectChanges, ProjectCreated, ProjectDetailOut, ProjectOut, ProjectSummary, TicketOut, TicketRaised,
+    TicketBulkRequest, TicketBulkResult, TicketSearchHit,
+)
+from .responses import FastJSONResponse
 from .notifications import notify_activity as send_notification
-from .ws import log_user_visit
+from .ws import log_user_visit, presence_counts
+from .dispatch import get_dispatcher
+from .versions import (
+    CHANGE_TOKEN_HEADER, bump_board_version, bump_projects_list_version, etag_headers, etag_matches, get_projects_list_version,
+    if_match_version, make_etag, not_modified, reserve_change_tokens, settled_change_token, settled_token, ticket_etag,
+)
+from .pagination import (
+    NEXT_CURSOR_HEADER, activity_cursor, activity_page_filter, id_cursor, id_page_filter,
+    ndjson_line, ndjson_response, page_limit, projection, search_cursor, search_page_filter, split_page, stream_page,
+    wants_ndjson,
+)
+
+
+def notify_activity(db, project_id: int, message: str, actor_email: str, ticket_id: int | None = None,
+                    change_token: int | None = None) -> None:
+    send_notification(db, project_id, message, actor_email, ticket_id, change_token)
 
+router = APIRouter(prefix="/api", tags=["api"])
 
-def notify_activity(db, project_id: int, message: str, actor_email: str, ticket_id: int | None = None) -> None:
-    send_notification(db, project_id, message, actor_email, ticket_id)
+VALID_STATUSES = ["todo", "deployed", "done", "inprogress","proposed"]
+
+ticket_project_cache = TTLCache(maxsize=Config.TICKET_PROJECT_CACHE_SIZE, ttl=24 * 60 * 60)
+
+for _stat in ("size", "hits", "misses", "evictions"):
+    register_gauge(f"ticket_project_cache_{_stat}", f"ticket project cache {_stat}",
+                   lambda stat=_stat: ticket_project_cache.stats()[stat])
+
+
+async def ticket_project_id(db, ticket_id: int) -> int | None:
+    #the project a ticket belongs to, needed before its write to reserve a change token
+    project_id = ticket_project_cache.get(ticket_id)
+    if project_id is None:
+        ticket = await db["tickets"].find_one({"id": ticket_id}, {"_id": 0, "project_id": 1})
+        if not ticket:
+            return None
+        project_id = int(ticket["project_id"])
+        ticket_project_cache.set(ticket_id, project_id)
+    return project_id
+
+
+def page_response(content, next_cursor: str | None = None, headers: dict | None = None) -> FastJSONResponse:
+    headers = dict(headers or {})
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return FastJSONResponse(content=content, headers=headers or None)
 
-router = APIRouter(prefix="/api", tags=["api"])
 
+@router.get("/projects", response_model=list[ProjectOut])
+async def get_projects(request: Request, cursor: str | None = None, page_size: int | None = None,
+                       fields: str | None = None, format: str | None = None, db = Depends(get_read_database)):
+    ndjson = wants_ndjson(request, format)
+    etag = make_etag("projects", await get_projects_list_version(db), request, "ndjson" if ndjson else None)
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
-@router.get("/projects")
-def get_projects(db = Depends(get_database)):
-    projects = list(db["projects"].find({}, {"_id": 0}))
-    return projects
+    # per-board versions and counters change with every ticket write, keep them out of the list body
+    fields_projection = projection(fields, ["id"])
+    exclusion = fields_projection == {"_id": 0}
+    for field in ("version", "board_version", "status_counts"):
+        if exclusion:
+            fields_projection[field] = 0
+        else:
+            fields_projection.pop(field, None)
 
+    limit = page_limit(page_size)
+    query = db["projects"].find(id_page_filter({}, cursor), fields_projection).sort("id", 1)
+    if limit is not None:
+        query = query.limit(limit + 1)
 
-@router.post("/projects")
-def create_project(data: ProjectCreate, user = Depends(get_current_user), db = Depends(get_database)):
+    if ndjson:
+        return ndjson_response(stream_page(query, limit, id_cursor), etag_headers(etag))
+
+    projects, has_more = split_page(await query.to_list(), limit)
+    return page_response(projects, id_cursor(projects[-1]) if has_more else None, etag_headers(etag))
+
+
+@router.post("/projects", status_code=201, response_model=ProjectCreated)
+async def create_project(data: ProjectCreate, user = Depends(get_current_user), db = Depends(get_database)):
     try:
         projects = db["projects"]
-        new_id = get_next_sequence(db, "projects")
-        project = {"id": new_id, "name": data.name, "created_at": utc_now()}
-        projects.insert_one(project)
+        new_id = await get_next_sequence(db, "projects")
+        project = {"id": new_id, "name": data.name, "created_at": utc_now(), "version": 0, "board_version": 0,
+                   "status_counts": {}}
+        await projects.insert_one(project)
+        await bump_projects_list_version(db)
         
         activity = {
             "project_id": new_id,
@@ -36,52 +108,163 @@ def create_project(data: ProjectCreate, user = Depends(get_current_user), db = D
             "created_at": utc_now()
         }
         
-        db["activities"].insert_one(activity.copy())
+        await record_activity(db, activity)
 
-        log_user_visit(int(user["id"]), str(new_id))
+        await log_user_visit(int(user["id"]), str(new_id))
 
         
         notify_activity(db, project_id=int(new_id), message=activity["message"], actor_email=user["email"]) 
         
-        return JSONResponse(status_code=201, content=jsonable_encoder({
+        return FastJSONResponse(status_code=201, content={
             "message": "Project created",
             "project": {
                 "id": project["id"],
                 "name": project["name"],
                 "created_at": project["created_at"],
             },
-        }))
+        })
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating project: {str(e)}")
 
 
-@router.get("/projects/{project_id}")
-def get_project(project_id: int, db = Depends(get_database)):
+@router.get("/projects/summary", response_model=list[ProjectSummary])
+async def get_projects_summary(db = Depends(get_read_database)):
+    #ticket counts by status for every project, read from the counters kept on the project documents
+    projects = await db["projects"].find({}, {"_id": 0, "id": 1, "name": 1, "status_counts": 1}).sort("id", 1).to_list()
+    summary = []
+    for project in projects:
+        stored = project.get("status_counts") or {}
+        counts = {status: int(stored.get(status, 0)) for status in VALID_STATUSES}
+        counts.update({status: int(n) for status, n in stored.items() if status not in counts and n})
+        summary.append({"id": project["id"], "name": project.get("name"), "counts": counts, "total": sum(counts.values())})
+    return FastJSONResponse(content=summary)
 
-    project = db["projects"].find_one({"id": project_id}, {"_id": 0})
+
+@router.get("/projects/{project_id}", response_model=ProjectDetailOut)
+async def get_project(project_id: int, request: Request, cursor: str | None = None,
+                      page_size: int | None = None, fields: str | None = None, format: str | None = None,
+                      db = Depends(get_read_database)):
+
+    project = await db["projects"].find_one({"id": project_id}, {"_id": 0})
 
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    tickets = list(db["tickets"].find({"project_id": project_id}, {"_id": 0}))
-
-    return {
+    # answer conditional requests from the project document alone, before touching tickets;
+    # board_version moves only after a write landed, so a tag never covers a board missing that write
+    board_version = project.pop("board_version", 0)
+    project.pop("version", None)
+    project.pop("status_counts", None)
+    ndjson = wants_ndjson(request, format)
+    etag = make_etag(f"board-{project_id}", board_version, request, "ndjson" if ndjson else None)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    change_token = await settled_change_token(db, project_id)
+    headers = {**etag_headers(etag), CHANGE_TOKEN_HEADER: str(change_token)}
+
+    # cursor, page_size and fields apply to the tickets
+    limit = page_limit(page_size)
+    query = db["tickets"].find(
+        id_page_filter({"project_id": project_id}, cursor),
+        projection(fields, ["id"]),
+    ).sort("id", 1)
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    if ndjson:
+        # first line is the project, then one line per ticket
+        async def lines():
+            yield ndjson_line(project)
+            async for line in stream_page(query, limit, id_cursor):
+                yield line
+        return ndjson_response(lines(), headers)
+
+    tickets, has_more = split_page(await query.to_list(), limit)
+
+    return page_response({
         "project": project,
         "tickets": tickets,
-    }
+        "change_token": change_token,
+    }, id_cursor(tickets[-1]) if has_more else None, headers)
 
 
-@router.post("/tickets")
-def create_ticket(data: TicketCreate, user = Depends(get_current_user), db = Depends(get_database)):
+@router.get("/projects/{project_id}/changes", response_model=ProjectChanges)
+async def get_project_changes(project_id: int, since: int = 0, page_size: int | None = None,
+                              db = Depends(get_read_database)):
+    #tickets written after the `since` change token, oldest change first
+    project = await db["projects"].find_one({"id": project_id}, {"_id": 0, "id": 1})
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    limit = page_limit(page_size)
+    query = db["tickets"].find(
+        {"project_id": project_id, "change_seq": {"$gt": since}}, {"_id": 0},
+    ).sort("change_seq", 1)
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    tickets, truncated = split_page(await query.to_list(), limit)
+    # the token only advances past settled changes, newer ones are sent again on the next call;
+    # a truncated page whose changes are all unsettled reports has_more=False so clients do not spin
+    change_token = settled_token(tickets, since)
+    has_more = truncated and change_token > since
+    return FastJSONResponse(content={"tickets": tickets, "change_token": change_token, "has_more": has_more})
+
+
+@router.get("/tickets/search", response_model=list[TicketSearchHit])
+async def search_tickets(request: Request, q: str, project_id: int | None = None, status: str | None = None,
+                         creator_email: str | None = None, page_size: int = 20, cursor: str | None = None,
+                         fields: str | None = None, format: str | None = None, db = Depends(get_read_database)):
+    #full-text search over ticket descriptions (description_text index), best match first
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query must not be empty")
+    if status is not None and status not in VALID_STATUSES:
+        raise HTTPException(status_code=400, detail="Invalid status")
+
+    match = {"$text": {"$search": q}}
+    if project_id is not None:
+        match["project_id"] = project_id
+    if status is not None:
+        match["status"] = status
+    if creator_email is not None:
+        match["creator_email"] = creator_email
+
+    limit = page_limit(page_size)
+    pipeline = [
+        {"$match": match},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+    ]
+    after = search_page_filter(cursor)
+    if after:
+        pipeline.append({"$match": after})
+    pipeline += [
+        {"$sort": {"score": -1, "id": 1}},
+        {"$limit": limit + 1},
+        {"$project": projection(fields, ["id", "score"])},
+    ]
+    query = await db["tickets"].aggregate(pipeline)
+
+    if wants_ndjson(request, format):
+        return ndjson_response(stream_page(query, limit, search_cursor))
+
+    tickets, has_more = split_page(await query.to_list(), limit)
+    return page_response(tickets, search_cursor(tickets[-1]) if has_more else None)
+
+
+@router.post("/tickets", status_code=201, response_model=TicketRaised)
+async def create_ticket(data: TicketCreate, user = Depends(get_current_user), db = Depends(get_database)):
     try:
-        project = db["projects"].find_one({"id": data.project_id})
+        project = await db["projects"].find_one({"id": data.project_id})
 
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
         
         user_email = user['email']
-        new_id = get_next_sequence(db, "tickets")
+        new_id = await get_next_sequence(db, "tickets")
+        # reserve the change token before taking the timestamps (see versions.settled_token)
+        change_seq = await reserve_change_tokens(db, data.project_id)
         ticket = {
             "id": new_id,
             "project_id": data.project_id,
@@ -93,8 +276,10 @@ def create_ticket(data: TicketCreate, user = Depends(get_current_user), db = Dep
             "updated_by_email": user_email,  
             "created_at": utc_now(),
             "updated_at": utc_now(),
+            "change_seq": change_seq,
         }
-        db["tickets"].insert_one(ticket.copy())
+        await db["tickets"].insert_one(ticket.copy())
+        ticket_project_cache.set(new_id, int(data.project_id))
         
         
         activity = {
@@ -104,19 +289,23 @@ def create_ticket(data: TicketCreate, user = Depends(get_current_user), db = Dep
             "actor_email": user_email,
             "created_at": utc_now(),
         }
-        db["activities"].insert_one(activity.copy())
+        await asyncio.gather(
+            record_activity(db, activity),
+            bump_board_version(db, data.project_id, status_count_inc(None, "todo")),
+        )
         
-        log_user_visit(int(user["id"]), str(data.project_id))
+        await log_user_visit(int(user["id"]), str(data.project_id))
         
-        notify_activity(db, project_id=int(data.project_id), message=activity["message"], actor_email=user["email"], ticket_id=int(new_id))
+        notify_activity(db, project_id=int(data.project_id), message=activity["message"], actor_email=user["email"],
+                        ticket_id=int(new_id), change_token=ticket["change_seq"])
 
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=201,
-            content=jsonable_encoder({
+            content={
                 "message": "Ticket Raised",
                 
                 "ticket": {**ticket, "actor_email": user["email"]}
-            })
+            }
         )
         
     except HTTPException:
@@ -125,76 +314,262 @@ def create_ticket(data: TicketCreate, user = Depends(get_current_user), db = Dep
         raise HTTPException(status_code=500, detail=f"Error creating ticket: {str(e)}")
 
 
-@router.patch("/tickets/{ticket_id}")
-def update_ticket(ticket_id: int, data: TicketUpdate, user = Depends(get_current_user), db = Depends(get_database)):
-    ticket = db["tickets"].find_one({"id": ticket_id})
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
-    
-    
+@router.post("/tickets/bulk", response_model=TicketBulkResult)
+async def bulk_tickets(data: TicketBulkRequest, user = Depends(get_current_user), db = Depends(get_database)):
+    #many creates and status changes in one request: one insert_many, concurrent updates, one notification per project
+    if not data.create and not data.update:
+        raise HTTPException(status_code=400, detail="No operations")
+    if len(data.create) + len(data.update) > Config.BULK_MAX_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {Config.BULK_MAX_OPERATIONS} operations per request")
+
+    for change in data.update:
+        if change.status is not None and change.status not in VALID_STATUSES:
+            raise HTTPException(status_code=400, detail=f"Invalid status for ticket {change.id}")
+    update_ids = [change.id for change in data.update]
+    if len(set(update_ids)) != len(update_ids):
+        raise HTTPException(status_code=400, detail="Duplicate ticket id in update")
+
+    current = {}
+    if update_ids:
+        current = {t["id"]: t for t in await db["tickets"].find({"id": {"$in": update_ids}}, {"_id": 0}).to_list()}
+        missing = [ticket_id for ticket_id in update_ids if ticket_id not in current]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Tickets not found: {missing}")
+
+    create_project_ids = {t.project_id for t in data.create}
+    if create_project_ids:
+        projects = await db["projects"].find({"id": {"$in": list(create_project_ids)}}, {"_id": 0, "id": 1}).to_list()
+        found = {p["id"] for p in projects}
+        missing = sorted(create_project_ids - found)
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Projects not found: {missing}")
+
+    try:
+        user_id = int(user["id"])
+        user_email = user["email"]
+
+        # one token reservation per project; its writes take consecutive change tokens
+        per_project: dict[int, int] = {}
+        for t in data.create:
+            per_project[t.project_id] = per_project.get(t.project_id, 0) + 1
+        for change in data.update:
+            project_id = int(current[change.id]["project_id"])
+            per_project[project_id] = per_project.get(project_id, 0) + 1
+        next_token = {}
+        for project_id, count in per_project.items():
+            version = await reserve_change_tokens(db, project_id, count)
+            next_token[project_id] = version - count + 1
+        now = utc_now()
+
+        def take_token(project_id: int) -> int:
+            token = next_token[project_id]
+            next_token[project_id] += 1
+            return token
+
+        activities, created, updated, changes = [], [], [], []
+        summary: dict[int, dict] = {}
+        status_inc: dict[int, dict] = {}
+        last_token: dict[int, int] = {}
+
+        new_ids = await allocate_ids(db, "tickets", len(data.create)) if data.create else []
+        for new_id, t in zip(new_ids, data.create):
+            ticket = {
+                "id": new_id,
+                "project_id": t.project_id,
+                "description": t.description,
+                "status": "todo",
+                "creator_id": user_id,
+                "creator_email": user_email,
+                "updated_by_id": user_id,
+                "updated_by_email": user_email,
+                "created_at": now,
+                "updated_at": now,
+                "change_seq": take_token(t.project_id),
+            }
+            created.append(ticket)
+            activities.append({
+                "project_id": t.project_id,
+                "ticket_id": new_id,
+                "message": user_email + " raised a ticket",
+                "actor_email": user_email,
+                "created_at": now,
+            })
+            summary.setdefault(t.project_id, {"raised": 0, "moved": 0})["raised"] += 1
+            status_count_inc(None, "todo", status_inc.setdefault(t.project_id, {}))
+            last_token[t.project_id] = ticket["change_seq"]
+
+        for change in data.update:
+            ticket = current[change.id]
+            update_fields = {"updated_by_id": user_id, "updated_by_email": user_email, "updated_at": now,
+                             "change_seq": take_token(int(ticket["project_id"]))}
+            if change.description is not None:
+                update_fields["description"] = change.description
+            ticket_filter = {"id": change.id}
+            if change.status is not None:
+                update_fields["status"] = change.status
+                # a status move only applies to the status it was read with, so the counters below stay exact
+                ticket_filter["status"] = ticket["status"]
+            changes.append((ticket_filter, update_fields))
+
+        async def insert_created():
+            if created:
+                await db["tickets"].insert_many([ticket.copy() for ticket in created], ordered=False)
+
+        # each update reports the document it replaced, so outcomes come from the writes themselves
+        _, *befores = await asyncio.gather(insert_created(), *(
+            db["tickets"].find_one_and_update(
+                ticket_filter,
+                {"$set": update_fields},
+                projection={"_id": 0},
+                return_document=ReturnDocument.BEFORE,
+            )
+            for ticket_filter, update_fields in changes
+        ))
+        for ticket in created:
+            ticket_project_cache.set(ticket["id"], int(ticket["project_id"]))
+
+        conflicts = []
+        for (ticket_filter, update_fields), before in zip(changes, befores):
+            if before is None:
+                conflicts.append(ticket_filter["id"])
+                continue
+            project_id = int(before["project_id"])
+            updated.append({**before, **update_fields})
+            old_status = before["status"]
+            new_status = update_fields.get("status", old_status)
+            activities.append({
+                "project_id": project_id,
+                "ticket_id": before["id"],
+                "message": user_email + " moved Ticket:" + str(before["id"]) + " from " + old_status + " to " + new_status,
+                "actor_email": user_email,
+                "created_at": now,
+            })
+            summary.setdefault(project_id, {"raised": 0, "moved": 0})["moved"] += 1
+            status_count_inc(old_status, new_status, status_inc.setdefault(project_id, {}))
+            last_token[project_id] = max(last_token.get(project_id, 0), update_fields["change_seq"])
+
+        await asyncio.gather(
+            record_activities(db, activities),
+            *(bump_board_version(db, project_id, status_inc.get(project_id)) for project_id in summary),
+        )
+
+        for project_id, counts in summary.items():
+            await log_user_visit(user_id, str(project_id))
+            parts = []
+            if counts["raised"]:
+                parts.append(f"raised {counts['raised']} ticket{'s' if counts['raised'] != 1 else ''}")
+            if counts["moved"]:
+                parts.append(f"moved {counts['moved']} ticket{'s' if counts['moved'] != 1 else ''}")
+            notify_activity(db, project_id=project_id, message=user_email + " " + " and ".join(parts),
+                            actor_email=user_email, change_token=last_token[project_id])
+
+        message = f"{len(created)} tickets raised, {len(updated)} tickets updated"
+        if conflicts:
+            message += f", {len(conflicts)} changed concurrently and left as they were"
+        return FastJSONResponse(content={
+            "message": message,
+            "created": created,
+            "updated": updated,
+            "conflicts": conflicts,
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error applying bulk ticket operations: {str(e)}")
+
+
+@router.patch("/tickets/{ticket_id}", response_model=TicketOut)
+async def update_ticket(ticket_id: int, data: TicketUpdate, request: Request, user = Depends(get_current_user),
+                        db = Depends(get_database)):
+    expected_version = if_match_version(request)
+
     update_fields = {}
     if data.description is not None:
         update_fields["description"] = data.description
-    
-    old_status = ticket['status']
-    new_status = data.status
-    id = ticket['id']
-    updated_by = user['email']
-
-    valid_status = ["todo", "deployed", "done", "inprogress","proposed"]
 
     if data.status is not None:
-        if data.status not in valid_status:
+        if data.status not in VALID_STATUSES:
             raise HTTPException(status_code=400, detail="Invalid status")
         update_fields["status"] = data.status
-    
+
+    ticket_filter = {"id": ticket_id}
+    if expected_version is None:
+        project_id = await ticket_project_id(db, ticket_id)
+        if project_id is None:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+    else:
+        # check the precondition before reserving a change token, so a rejected write consumes none
+        current = await db["tickets"].find_one({"id": ticket_id}, {"_id": 0, "project_id": 1, "change_seq": 1})
+        if current is None:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        if int(current.get("change_seq") or 0) != expected_version:
+            raise HTTPException(status_code=412, detail="Ticket was modified")
+        project_id = int(current["project_id"])
+        ticket_project_cache.set(ticket_id, project_id)
+        # tickets written before change tokens existed are version 0
+        ticket_filter["change_seq"] = {"$in": [0, None]} if expected_version == 0 else expected_version
+
+    updated_by = user['email']
+    update_fields["change_seq"] = await reserve_change_tokens(db, project_id)
     update_fields["updated_by_id"] = int(user["id"])
-    update_fields["updated_by_email"] = user["email"]  
-    db["tickets"].update_one(
-        {"id": ticket_id},
-        {"$set": update_fields, "$currentDate": {"updated_at": True}},
+    update_fields["updated_by_email"] = user["email"]
+    update_fields["updated_at"] = utc_now()
+
+    # the BEFORE image is the state this write replaced, so "from X to Y" stays right under concurrent moves
+    before = await db["tickets"].find_one_and_update(
+        ticket_filter,
+        {"$set": update_fields},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE,
     )
-    
-    
+    if before is None:
+        if expected_version is not None:
+            # lost a race after the check: the reserved token stays unused, the board ETag is untouched
+            raise HTTPException(status_code=412, detail="Ticket was modified")
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    ticket = {**before, **update_fields}
+
+    old_status = before['status']
+    new_status = ticket['status']
     activity = {
-        "project_id": int(ticket["project_id"]),
+        "project_id": project_id,
         "ticket_id": ticket_id,
-        "message": updated_by + " moved Ticket:" + str(id) + " from " + old_status + " to " + new_status,
+        "message": updated_by + " moved Ticket:" + str(ticket_id) + " from " + old_status + " to " + new_status,
         "actor_email": user["email"],
         "created_at": utc_now(),
     }
-    db["activities"].insert_one(activity.copy())
+    await asyncio.gather(
+        record_activity(db, activity),
+        bump_board_version(db, project_id, status_count_inc(old_status, new_status)),
+    )
 
-    
-    log_user_visit(int(user["id"]), str(ticket["project_id"]))
+    await log_user_visit(int(user["id"]), str(project_id))
 
-    
-    notify_activity(db, project_id=int(ticket["project_id"]), message=activity["message"], actor_email=user["email"], ticket_id=int(ticket_id))
-
-    
-    ticket = db["tickets"].find_one({"id": ticket_id}, {"_id": 0})
-    return ticket
+    notify_activity(db, project_id=project_id, message=activity["message"], actor_email=user["email"],
+                    ticket_id=int(ticket_id), change_token=update_fields["change_seq"])
 
+    return FastJSONResponse(content=ticket, headers={"ETag": ticket_etag(update_fields["change_seq"])})
 
 
 @router.post("/super-toggle")
-def set_super_toggle(data: SuperToggleRequest, user = Depends(get_current_user), db = Depends(get_database)):
+async def set_super_toggle(data: SuperToggleRequest, user = Depends(get_current_user), db = Depends(get_database)):
     
     if data.enable and data.password != Config.SUPER_TOGGLE_PWD:
         raise HTTPException(status_code=403, detail="Invalid password")
     
     user_id = int(user["id"])
 
-    toggle = db["user_super_toggle"].find_one({"user_id": user_id}, {"_id": 0})
+    toggle = await db["user_super_toggle"].find_one({"user_id": user_id}, {"_id": 0})
     if not toggle:
-        db["user_super_toggle"].insert_one({
+        await db["user_super_toggle"].insert_one({
             "user_id": user_id, 
             "enabled": data.enable, 
             "updated_at": utc_now()
         })
         enabled = data.enable
     else:
-        db["user_super_toggle"].update_one(
+        await db["user_super_toggle"].update_one(
             {"user_id": user_id}, 
             {"$set": {"enabled": data.enable}, "$currentDate": {"updated_at": True}}
         )
@@ -204,28 +579,68 @@ def set_super_toggle(data: SuperToggleRequest, user = Depends(get_current_user),
 
 
 @router.get("/super-toggle")
-def get_super_toggle(user = Depends(get_current_user), db = Depends(get_database)):
+async def get_super_toggle(user = Depends(get_current_user), db = Depends(get_database)):
     user_id = int(user["id"])
     
-    toggle = db["user_super_toggle"].find_one({"user_id": user_id}, {"_id": 0}) or {}
+    toggle = await db["user_super_toggle"].find_one({"user_id": user_id}, {"_id": 0}) or {}
     return {"enabled": bool(toggle.get("enabled", False))}
 
 
 
-@router.get("/activities")
-def list_activities(limit: int = 20, db = Depends(get_database), user = Depends(get_current_user)):
+async def activity_page(db, request: Request, base: dict, limit: int,
+                        cursor: str | None, fields: str | None, format: str | None):
+    limit = page_limit(limit)
+    # _id is fetched as the keyset tie-breaker and stripped before returning
+    fields_projection = {k: v for k, v in projection(fields, ["created_at"]).items() if k != "_id"} or None
+    if bucketed():
+        rows = await read_bucket_page(db, base, limit, cursor, fields_projection)
+        if wants_ndjson(request, format):
+            return ndjson_response(stream_page(iterate(rows), limit, activity_cursor, strip_id=True))
+    else:
+        query = db["activities"].find(
+            activity_page_filter(base, cursor),
+            fields_projection,
+        ).sort([("created_at", -1), ("_id", -1)]).limit(limit + 1)
+
+        if wants_ndjson(request, format):
+            return ndjson_response(stream_page(query, limit, activity_cursor, strip_id=True))
+        rows = await query.to_list()
+
+    items, has_more = split_page(rows, limit)
+    next_cursor = activity_cursor(items[-1]) if has_more else None
+    for item in items:
+        item.pop("_id", None)
+    return page_response(items, next_cursor)
+
+
+@router.get("/activities", response_model=list[ActivityOut])
+async def list_activities(request: Request, limit: int = 20, cursor: str | None = None,
+                          fields: str | None = None, format: str | None = None,
+                          db = Depends(get_read_database), user = Depends(get_current_user)):
     # No visit logging needed for activities list (not project-specific)
-    items = list(db["activities"].find({}, {"_id": 0}).sort("created_at", -1).limit(int(limit)))
-    return items
+    return await activity_page(db, request, {}, limit, cursor, fields, format)
 
 
-@router.get("/projects/{project_id}/activities")
-def list_project_activities(project_id: int, limit: int = 20, db = Depends(get_database), user = Depends(get_current_user)):
+@router.get("/projects/{project_id}/activities", response_model=list[ActivityOut])
+async def list_project_activities(project_id: int, request: Request, limit: int = 20,
+                                  cursor: str | None = None, fields: str | None = None, format: str | None = None,
+                                  db = Depends(get_read_database), user = Depends(get_current_user)):
     
-    log_user_visit(int(user["id"]), str(project_id))
-    items = list(
-        db["activities"].find({"project_id": int(project_id)}, {"_id": 0}).sort("created_at", -1).limit(int(limit))
-    )
-    return items
+    await log_user_visit(int(user["id"]), str(project_id))
+    return await activity_page(db, request, {"project_id": int(project_id)}, limit, cursor, fields, format)
+
+
+@router.get("/presence")
+async def get_presence(user = Depends(get_current_user)):
+    return presence_counts()
+
+
+@router.get("/dispatch-stats")
+async def get_dispatch_stats(user = Depends(get_current_user)):
+    return get_dispatcher().stats()
 
 
+@router.get("/pool-stats")
+async def get_pool_stats(user = Depends(get_current_user)):
+    #Mongo connection pools per server: open and checked-out connections, checkout failures, clears
+    return pool_listener.stats()
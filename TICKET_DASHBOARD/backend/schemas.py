@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
+from datetime import datetime
 
 
 class OTPRequest(BaseModel):
@@ -41,6 +42,89 @@ class TicketUpdate(BaseModel):
     status: Optional[str] = Field(default="proposed", description="status of the ticket")
 
 
+class TicketBulkUpdate(BaseModel):
+    id: int = Field(..., description="id of the ticket")
+    description: Optional[str] = Field(default=None, description="description of the ticket")
+    status: Optional[str] = Field(default=None, description="status of the ticket")
+
+
+class TicketBulkRequest(BaseModel):
+    create: List[TicketCreate] = Field(default_factory=list, description="tickets to raise")
+    update: List[TicketBulkUpdate] = Field(default_factory=list, description="tickets to change")
+
+
 class SuperToggleRequest(BaseModel):
     enable: bool
-    password: str
\ No newline at end of file
+    password: str
+
+
+# Response models. Every field but the key is optional because list endpoints accept a `fields` projection.
+
+class ProjectOut(BaseModel):
+    id: int
+    name: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class TicketOut(BaseModel):
+    id: int
+    project_id: Optional[int] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+    creator_id: Optional[int] = None
+    creator_email: Optional[str] = None
+    updated_by_id: Optional[int] = None
+    updated_by_email: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    change_seq: Optional[int] = None
+
+
+class ActivityOut(BaseModel):
+    project_id: Optional[int] = None
+    ticket_id: Optional[int] = None
+    message: Optional[str] = None
+    actor_email: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class ProjectSummary(BaseModel):
+    id: int
+    name: Optional[str] = None
+    counts: Dict[str, int]
+    total: int
+
+
+class ProjectDetailOut(BaseModel):
+    project: ProjectOut
+    tickets: List[TicketOut]
+    change_token: int
+
+
+class ProjectChanges(BaseModel):
+    tickets: List[TicketOut]
+    change_token: int
+    has_more: bool
+
+
+class ProjectCreated(BaseModel):
+    message: str
+    project: ProjectOut
+
+
+class TicketRaised(BaseModel):
+    message: str
+    ticket: TicketOut
+
+
+class TicketSearchHit(TicketOut):
+    score: float
+
+
+class TicketBulkResult(BaseModel):
+    message: str
+    created: List[TicketOut]
+    updated: List[TicketOut]
+    # ids of status moves skipped because the ticket's status changed since it was read
+    conflicts: List[int] = Field(default_factory=list)
+
@@ -0,0 +1,117 @@
+from fastapi import HTTPException, Request, Response
+from hashlib import sha1
+from datetime import datetime, timedelta, timezone
+from pymongo import ReturnDocument
+from .config import Config
+from .db import utc_now
+
+
+# Board versions back strong ETags: a project's `board_version` is bumped after
+# every ticket write has landed, and the `versions` document "projects" by
+# project writes. Change tokens for delta sync are a separate counter, the
+# project's `version`: a ticket write reserves its token before writing and
+# stamps the ticket with it (`change_seq`). A reserved token can land after a
+# higher one, so clients are only handed settled tokens (see settled_token).
+
+async def reserve_change_tokens(db, project_id: int, count: int = 1) -> int:
+    #reserves `count` change tokens and returns the highest; the batch owns (version - count, version]
+    project = await db["projects"].find_one_and_update(
+        {"id": int(project_id)},
+        {"$inc": {"version": int(count)}},
+        projection={"_id": 0, "version": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    return int((project or {}).get("version", 0))
+
+
+async def bump_board_version(db, project_id: int, inc: dict | None = None) -> None:
+    #after a ticket write landed: invalidates the board ETag; `inc` rides along, e.g. status counter moves
+    await db["projects"].update_one({"id": int(project_id)}, {"$inc": {**(inc or {}), "board_version": 1}})
+
+
+def _settled_before() -> datetime:
+    # updated_at is taken after the token was reserved, so every lower token was reserved
+    # earlier still; a write older than the overlap window has had that long to land
+    return utc_now() - timedelta(seconds=Config.CHANGES_OVERLAP_SECONDS)
+
+
+def _is_settled(ticket: dict, settled_before: datetime) -> bool:
+    updated_at = ticket.get("updated_at")
+    if not isinstance(updated_at, datetime):
+        return False
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return updated_at <= settled_before
+
+
+def settled_token(tickets: list, since: int) -> int:
+    #highest change token of a change-ordered page that every lower token has landed behind
+    settled_before = _settled_before()
+    tokens = [int(t["change_seq"]) for t in tickets if _is_settled(t, settled_before)]
+    return max([since, *tokens])
+
+
+async def settled_change_token(db, project_id: int) -> int:
+    #token for a full board read: the newest change older than the overlap window
+    ticket = await db["tickets"].find_one(
+        {"project_id": int(project_id), "change_seq": {"$gt": 0}, "updated_at": {"$lte": _settled_before()}},
+        {"_id": 0, "change_seq": 1},
+        sort=[("change_seq", -1)],
+    )
+    return int((ticket or {}).get("change_seq", 0))
+
+
+CHANGE_TOKEN_HEADER = "X-Change-Token"
+
+
+async def bump_projects_list_version(db) -> None:
+    await db["versions"].update_one({"_id": "projects"}, {"$inc": {"v": 1}}, upsert=True)
+
+
+async def get_projects_list_version(db) -> int:
+    doc = await db["versions"].find_one({"_id": "projects"})
+    return int((doc or {}).get("v", 0))
+
+
+def make_etag(kind: str, version: int, request: Request, variant: str | None = None) -> str:
+    # paging/projection params and the response format change the body, so they are part of the tag
+    etag = f"{kind}-{int(version)}"
+    if variant:
+        etag += f"-{variant}"
+    if request.url.query:
+        etag += "-" + sha1(request.url.query.encode()).hexdigest()[:12]
+    return f'"{etag}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in candidates
+
+
+def ticket_etag(change_seq: int) -> str:
+    return f'"{int(change_seq)}"'
+
+
+def if_match_version(request: Request) -> int | None:
+    #the ticket version (change_seq) a write is conditional on; None when unconditional
+    header = (request.headers.get("if-match") or "").strip()
+    if not header or header == "*":
+        return None
+    try:
+        return int(header.removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must be a ticket version")
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def etag_headers(etag: str) -> dict:
+    #no-cache: clients may store the body but must revalidate with If-None-Match
+    return {"ETag": etag, "Cache-Control": "no-cache"}
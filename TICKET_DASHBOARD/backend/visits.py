@@ -0,0 +1,109 @@
+from typing import Dict, Tuple
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+import asyncio
+from .config import Config
+from .db import get_async_db, utc_now
+
+
+class VisitBuffer:
+    """Write-behind buffer for project visits.
+
+    Visits are coalesced per (user_id, project_id) in memory and flushed
+    periodically as bulk upserts into `last_visit`, one document per pair.
+    The raw `user_visits` log is only written when VISIT_RAW_LOG_ENABLED.
+    A batch that fails to flush (e.g. Mongo is still warming up) is merged
+    back and retried on the next tick.
+    """
+
+    def __init__(self):
+        self.pending: Dict[Tuple[int, int], datetime] = {}
+        self.raw: list[dict] = []
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+
+    def record(self, user_id: int, project_id: int) -> None:
+        visited_at = utc_now()
+        self.pending[(int(user_id), int(project_id))] = visited_at
+        if Config.VISIT_RAW_LOG_ENABLED:
+            self.raw.append({"user_id": int(user_id), "project_id": int(project_id), "visited_at": visited_at})
+        if len(self.pending) >= Config.VISIT_FLUSH_MAX_PENDING:
+            self._wakeup.set()
+
+    async def flush(self) -> bool:
+        #False when a batch could not be written; it stays buffered for the next flush
+        if not self.pending and not self.raw:
+            return True
+        pending, self.pending = self.pending, {}
+        raw, self.raw = self.raw, []
+
+        db = get_async_db()
+        if pending:
+            try:
+                await db["last_visit"].bulk_write([
+                    UpdateOne(
+                        {"user_id": user_id, "project_id": project_id},
+                        {"$max": {"visited_at": visited_at}},
+                        upsert=True,
+                    )
+                    for (user_id, project_id), visited_at in pending.items()
+                ], ordered=False)
+                pending = {}
+            except Exception as e:
+                print(f"❌ Failed to flush visits, retrying: {e}")
+        if raw:
+            try:
+                await db["user_visits"].insert_many(raw, ordered=False)
+                raw = []
+            except BulkWriteError as e:
+                # a retried batch may be partly written already; those rows fail as duplicates
+                if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                    print(f"❌ Failed to flush raw visits, retrying: {e}")
+                else:
+                    raw = []
+            except Exception as e:
+                print(f"❌ Failed to flush raw visits, retrying: {e}")
+
+        # visits recorded meanwhile are newer, keep the later timestamp per pair
+        for key, visited_at in pending.items():
+            if key not in self.pending or self.pending[key] < visited_at:
+                self.pending[key] = visited_at
+        if raw:
+            self.raw = (raw + self.raw)[-Config.VISIT_RAW_MAX_BUFFERED:]
+        return not pending and not raw
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), Config.VISIT_FLUSH_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not await self.flush():
+                # a full buffer would otherwise wake the loop on every visit while Mongo is down
+                await asyncio.sleep(Config.VISIT_FLUSH_INTERVAL_SECONDS)
+                self._wakeup.clear()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+
+visit_buffer: VisitBuffer | None = None
+
+
+def get_visit_buffer() -> VisitBuffer:
+    global visit_buffer
+
+    if visit_buffer is None:
+        visit_buffer = VisitBuffer()
+
+    return visit_buffer
@@ -1,13 +1,157 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Dict, Set, Optional
+from functools import lru_cache
+from typing import AbstractSet, Dict, List, Set, Optional, Union
+import asyncio
+import json
+import time
+import zlib
 import jwt
+import msgpack
 from .config import Config
-from .db import get_db, utc_now
+from .pubsub import get_pubsub
+from .metrics import WS_BROADCAST_SECONDS, WS_BYTES_SENT, WS_EVENTS_SENT, WS_FRAMES_SENT, register_gauge
+from .visits import get_visit_buffer
 
 router = APIRouter()
 
-# Presence: map user_id -> websocket
-user_id_to_ws: Dict[int, WebSocket] = {}
+
+ENCODINGS = ("json", "msgpack")
+
+
+@lru_cache(maxsize=1024)
+def _decode(message: str):
+    #one json.loads per broadcast message, shared by every msgpack socket it goes to
+    return json.loads(message)
+
+
+class Connection:
+    """A subscribed socket with its own bounded outbound queue and sender task.
+
+    Events queued within WS_COALESCE_WINDOW_SECONDS leave as one frame: the event
+    itself when alone, otherwise an array of events. encoding=msgpack sends binary
+    msgpack frames; compress=deflate runs every frame through one raw-deflate
+    stream (sync-flushed per frame, context kept across frames).
+    """
+
+    def __init__(self, websocket: WebSocket, user_id: int, project_id: Optional[int],
+                 encoding: str = "json", compress: bool = False):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.project_id = project_id
+        self.encoding = encoding
+        self.compressor = zlib.compressobj(wbits=-15) if compress else None
+        self.label = encoding + ("+deflate" if compress else "")
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=Config.WS_SEND_QUEUE_SIZE)
+        self.dropped = 0
+        self.closed = False
+        self.sender: Optional[asyncio.Task] = None
+        self.last_seen = time.monotonic()
+
+    def start(self) -> None:
+        self.sender = asyncio.create_task(self._send_loop())
+
+    def enqueue(self, message: str) -> bool:
+        #returns False when the connection is too slow and must be disconnected
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            if Config.WS_SLOW_CONSUMER_POLICY == "disconnect":
+                return False
+            # drop_oldest: keep the freshest events for a lagging client
+            self.queue.get_nowait()
+            self.queue.put_nowait(message)
+            self.dropped += 1
+        return True
+
+    def encode(self, messages: List[str]) -> Union[str, bytes]:
+        if self.encoding == "msgpack":
+            events = [_decode(message) for message in messages]
+            payload = msgpack.packb(events[0] if len(events) == 1 else events)
+        else:
+            # messages are already JSON, so an array frame is a plain join
+            text = messages[0] if len(messages) == 1 else "[" + ",".join(messages) + "]"
+            if self.compressor is None:
+                return text
+            payload = text.encode()
+
+        if self.compressor is not None:
+            payload = self.compressor.compress(payload) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        return payload
+
+    async def _send_loop(self) -> None:
+        try:
+            while True:
+                messages = [await self.queue.get()]
+                if Config.WS_COALESCE_WINDOW_SECONDS > 0:
+                    await asyncio.sleep(Config.WS_COALESCE_WINDOW_SECONDS)
+                    while not self.queue.empty():
+                        messages.append(self.queue.get_nowait())
+
+                frame = self.encode(messages)
+                if isinstance(frame, bytes):
+                    await asyncio.wait_for(self.websocket.send_bytes(frame), Config.WS_SEND_TIMEOUT_SECONDS)
+                else:
+                    await asyncio.wait_for(self.websocket.send_text(frame), Config.WS_SEND_TIMEOUT_SECONDS)
+                WS_FRAMES_SENT.inc((self.label,))
+                WS_EVENTS_SENT.inc((self.label,), len(messages))
+                WS_BYTES_SENT.inc((self.label,), len(frame) if isinstance(frame, bytes) else len(frame.encode()))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # send failed or timed out, the client is gone or stuck
+            await self.close(code=1011)
+
+    async def close(self, code: int = 1000) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        unregister(self)
+        if self.sender is not None and self.sender is not asyncio.current_task():
+            self.sender.cancel()
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+
+# Rooms: project_id -> subscribed connections; None holds connections
+# opened without a project_id, which receive every project's events.
+rooms: Dict[Optional[int], Set[Connection]] = {}
+
+# Presence: map user_id -> all of that user's open connections (one per tab)
+user_connections: Dict[int, Set[Connection]] = {}
+connection_count = 0
+
+PING_MESSAGE = json.dumps({"event": "ping"})
+
+heartbeat_task: Optional[asyncio.Task] = None
+
+
+def register(connection: Connection) -> None:
+    global connection_count
+
+    rooms.setdefault(connection.project_id, set()).add(connection)
+    user_connections.setdefault(connection.user_id, set()).add(connection)
+    connection_count += 1
+
+
+def unregister(connection: Connection) -> None:
+    global connection_count
+
+    room = rooms.get(connection.project_id)
+    if room is not None:
+        room.discard(connection)
+        if not room:
+            rooms.pop(connection.project_id, None)
+
+    connections = user_connections.get(connection.user_id)
+    if connections is not None and connection in connections:
+        connections.discard(connection)
+        connection_count -= 1
+        if not connections:
+            user_connections.pop(connection.user_id, None)
 
 
 def decode_user_id_from_token(token: str) -> Optional[int]:
@@ -18,18 +162,21 @@ def decode_user_id_from_token(token: str) -> Optional[int]:
         return None
 
 
-def log_user_visit(user_id: int, project_id_param: Optional[str], source: str = "") -> None:
+def parse_project_id(project_id_param: Optional[str]) -> Optional[int]:
+    try:
+        return int(project_id_param) if project_id_param else None
+    except ValueError:
+        return None
+
+
+async def log_user_visit(user_id: int, project_id_param: Optional[str], source: str = "") -> None:
 
     if project_id_param is None:
         return
         
     try:
-        db = get_db()
-        db["user_visits"].insert_one({
-            "user_id": int(user_id),
-            "project_id": int(project_id_param),
-            "visited_at": utc_now(),
-        })
+        # buffered; flushed to last_visit in bulk by the VisitBuffer task
+        get_visit_buffer().record(int(user_id), int(project_id_param))
     except Exception:
         pass
 
@@ -40,6 +187,10 @@ async def activity_websocket(websocket: WebSocket):
 
     project_id_param = websocket.query_params.get("project_id")
 
+    # opt-in frame formats: ?encoding=msgpack for binary msgpack, ?compress=deflate for a raw deflate stream
+    encoding = websocket.query_params.get("encoding") or "json"
+    compress = websocket.query_params.get("compress") == "deflate"
+
     user_id = decode_user_id_from_token(token)
 
     await websocket.accept()
@@ -48,33 +199,98 @@ async def activity_websocket(websocket: WebSocket):
         await websocket.close(code=4401)  # unauthorized
         return
 
-    user_id_to_ws[user_id] = websocket
+    if encoding not in ENCODINGS:
+        await websocket.close(code=1003)  # unsupported data
+        return
 
-    log_user_visit(int(user_id), project_id_param)
+    connection = Connection(websocket, int(user_id), parse_project_id(project_id_param), encoding, compress)
+    register(connection)
+    connection.start()
+
+    await log_user_visit(int(user_id), project_id_param)
 
     try:
         while True:
-            _ = await websocket.receive_text()
-    except WebSocketDisconnect:
+            # any client frame, text or binary (including the "pong" reply to our ping), counts as liveness
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+            connection.last_seen = time.monotonic()
+    except (WebSocketDisconnect, RuntimeError):
         pass
     finally:
-        if user_id in user_id_to_ws and user_id_to_ws[user_id] is websocket:
-            user_id_to_ws.pop(user_id, None)
+        await connection.close()
 
 
-async def broadcast(message: str) -> None:
-    stale_user_ids = []
-    for uid, client in user_id_to_ws.items():
-        try:
-            await client.send_text(message)
-        except Exception:
-            stale_user_ids.append(uid)
+async def deliver_local(message: str, project_id: Optional[int] = None) -> None:
+    #fan out to this node's room (every room when project_id is None) without awaiting any socket
+    started = time.perf_counter()
+    if project_id is None:
+        targets = [conn for room in rooms.values() for conn in room]
+    else:
+        targets = [*rooms.get(int(project_id), ()), *rooms.get(None, ())]
+
+    slow = [conn for conn in targets if not conn.enqueue(message)]
+    WS_BROADCAST_SECONDS.observe((), time.perf_counter() - started)
+
+    for conn in slow:
+        await conn.close(code=1013)  # try again later
+
+
+async def broadcast(message: str, project_id: Optional[int] = None) -> None:
+    #cluster-wide publish; the pub/sub backend also delivers to this node's sockets
+    await get_pubsub().publish(message, project_id)
 
-    for uid in stale_user_ids:
-        user_id_to_ws.pop(uid, None)
+
+async def _heartbeat() -> None:
+    #ping every connection and evict the ones that stayed silent past the idle timeout
+    while True:
+        await asyncio.sleep(Config.WS_HEARTBEAT_INTERVAL_SECONDS)
+        deadline = time.monotonic() - Config.WS_IDLE_TIMEOUT_SECONDS
+        for connections in list(user_connections.values()):
+            for conn in list(connections):
+                if conn.last_seen < deadline:
+                    await conn.close(code=4408)  # idle timeout
+                elif not conn.enqueue(PING_MESSAGE):
+                    await conn.close(code=1013)
+
+
+def get_local_user_ids() -> AbstractSet[int]:
+    #live view, O(1) membership
+    return user_connections.keys()
 
 
 def get_online_user_ids() -> Set[int]:
-    return set(user_id_to_ws.keys())
+    return get_pubsub().online_user_ids()
+
+
+def is_user_online(user_id: int) -> bool:
+    return get_pubsub().is_online(int(user_id))
+
+
+def presence_counts() -> Dict[str, int]:
+    return {
+        "connections": connection_count,
+        "users": len(user_connections),
+    }
+
+
+register_gauge("ws_connections", "Open WebSocket connections on this node", lambda: connection_count)
+register_gauge("ws_online_users", "Users with at least one open WebSocket on this node", lambda: len(user_connections))
+
+
+async def start_fanout() -> None:
+    global heartbeat_task
+
+    await get_pubsub().start(deliver_local, get_local_user_ids)
+    heartbeat_task = asyncio.create_task(_heartbeat())
+
+
+async def stop_fanout() -> None:
+    global heartbeat_task
 
+    if heartbeat_task is not None:
+        heartbeat_task.cancel()
+        heartbeat_task = None
+    await get_pubsub().stop()
 
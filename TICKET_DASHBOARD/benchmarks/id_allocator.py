@@ -0,0 +1,88 @@
+"""Id allocation throughput under many concurrent creators.
+
+    python -m benchmarks.id_allocator --creators 200 --ids 20 --rtt-ms 2 --write-ms 0.5
+
+Runs against an in-memory counters collection that adds a simulated
+round-trip and holds the counter document for --write-ms per update, the
+way writers serialize on a hot document on the server. Pass --mongo to use DATABASE_URL instead.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from backend import db as db_module
+
+
+class FakeCounters:
+    def __init__(self, rtt: float, write: float):
+        self.rtt = rtt
+        self.write = write
+        self.seq: dict[str, int] = {}
+        self.round_trips = 0
+        self._document_lock = asyncio.Lock()
+
+    async def find_one_and_update(self, filter, update, **kwargs):
+        self.round_trips += 1
+        await asyncio.sleep(self.rtt / 2)
+        async with self._document_lock:
+            await asyncio.sleep(self.write)
+            name = filter["_id"]
+            self.seq[name] = self.seq.get(name, 0) + update["$inc"]["seq"]
+            doc = {"_id": name, "seq": self.seq[name]}
+        await asyncio.sleep(self.rtt / 2)
+        return doc
+
+
+class FakeDatabase:
+    def __init__(self, rtt: float, write: float):
+        self.counters = FakeCounters(rtt, write)
+
+    def __getitem__(self, name):
+        return self.counters
+
+
+async def run(block_size: int, creators: int, ids_per_creator: int, rtt: float, write: float, mongo: bool) -> dict:
+    db = db_module.get_async_db() if mongo else FakeDatabase(rtt, write)
+    allocator = db_module.IdAllocator(block_size)
+    name = f"bench_{block_size}_{time.time_ns()}"
+
+    async def creator():
+        return [(await allocator.allocate(db, name))[0] for _ in range(ids_per_creator)]
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(creator() for _ in range(creators)))
+    elapsed = time.perf_counter() - started
+
+    allocated = [i for ids in results for i in ids]
+    assert len(allocated) == len(set(allocated)), "duplicate ids allocated"
+    return {
+        "block_size": block_size,
+        "ids": len(allocated),
+        "seconds": elapsed,
+        "ids_per_second": len(allocated) / elapsed,
+        "round_trips": None if mongo else db.counters.round_trips,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--creators", type=int, default=200)
+    parser.add_argument("--ids", type=int, default=20, help="ids allocated by each creator")
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    parser.add_argument("--write-ms", type=float, default=0.5, help="time the counter document stays locked per update")
+    parser.add_argument("--block-sizes", default="1,10,100")
+    parser.add_argument("--mongo", action="store_true")
+    args = parser.parse_args()
+
+    async def all_runs():
+        return [
+            await run(int(size), args.creators, args.ids, args.rtt_ms / 1000, args.write_ms / 1000, args.mongo)
+            for size in args.block_sizes.split(",")
+        ]
+
+    print(json.dumps(asyncio.run(all_runs()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""Load test for backend.main:app against a local Mongo stand-in.
+
+    python -m benchmarks.loadtest --duration 30 --concurrency 32 --ws-subscribers 50
+    python -m benchmarks.loadtest --database-url mongodb://localhost:27017 --compare benchmarks/results/<previous>.json
+
+Without --database-url the app runs on mongomock (pip install mongomock)
+through the sync driver path. The app is served by uvicorn in-process,
+seeded with projects, tickets and visits, and driven with a weighted mix of
+GET /api/projects/{id}, POST /api/tickets and PATCH /api/tickets/{id} while
+/ws/activity subscribers measure delivery lag. Results are written as JSON
+to benchmarks/results/ so runs can be compared between commits.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import time
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+STATUSES = ["todo", "deployed", "done", "inprogress", "proposed"]
+
+
+def configure_environment(args) -> None:
+    # Config is read at import time, so the environment must be set before importing backend
+    os.environ["JWT_SECRET"] = os.environ.get("JWT_SECRET") or "loadtest-secret-" + "x" * 32
+    os.environ["MAIL_TRANSPORT"] = "local"
+    os.environ["MONGO_DB_NAME"] = args.db_name
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+        os.environ["MONGO_SSL_ENABLED"] = os.environ.get("MONGO_SSL_ENABLED", "false")
+    else:
+        os.environ["DATABASE_URL"] = "mongodb://mongomock.invalid"
+        os.environ["MONGO_SSL_ENABLED"] = "false"
+        os.environ["MONGO_ASYNC_ENABLED"] = "false"
+
+
+def install_mongomock() -> None:
+    try:
+        import mongomock
+        from mongomock.collection import BulkOperationBuilder, Collection
+    except ImportError:
+        raise SystemExit("mongomock is required without --database-url: pip install mongomock")
+
+    from backend import db as db_module
+
+    # pymongo 4.x passes sort= to bulk updates, which mongomock does not accept
+    add_update = BulkOperationBuilder.add_update
+
+    def add_update_without_sort(self, *args, sort=None, **kwargs):
+        return add_update(self, *args, **kwargs)
+
+    BulkOperationBuilder.add_update = add_update_without_sort
+
+    # mongomock projects the matched document before checking that it exists, so find_one_and_*
+    # with a projection of fields the document lacks yet (the first $inc of a counter) matches
+    # nothing and returns None; modify without the projection and project the result instead
+    find_and_modify = Collection._find_and_modify
+
+    def find_and_modify_then_project(self, query, projection=None, *args, **kwargs):
+        doc = find_and_modify(self, query, None, *args, **kwargs)
+        if doc is None or not projection:
+            return doc
+        if not isinstance(projection, dict):
+            projection = {field: 1 for field in projection}
+        included = [field for field, keep in projection.items() if keep and field != "_id"]
+        if included:
+            projected = {field: doc[field] for field in included if field in doc}
+            if projection.get("_id", 1):
+                projected["_id"] = doc["_id"]
+            return projected
+        return {field: value for field, value in doc.items() if projection.get(field, 1)}
+
+    Collection._find_and_modify = find_and_modify_then_project
+    db_module.mongodb_client = mongomock.MongoClient()
+
+
+def seed(args) -> dict:
+    from backend.db import get_db, utc_now
+
+    db = get_db()
+    for name in ("users", "projects", "tickets", "activities", "last_visit", "counters"):
+        db[name].delete_many({})
+
+    now = utc_now()
+    users = [{"id": i, "email": f"load{i}@example.com", "created_at": now} for i in range(1, args.users + 1)]
+    projects = [{"id": i, "name": f"Load project {i}", "created_at": now} for i in range(1, args.projects + 1)]
+    tickets = [
+        {
+            "id": i,
+            "project_id": (i - 1) % args.projects + 1,
+            "description": f"Seeded ticket {i}",
+            "status": STATUSES[i % len(STATUSES)],
+            "creator_id": (i - 1) % args.users + 1,
+            "creator_email": f"load{(i - 1) % args.users + 1}@example.com",
+            "updated_by_id": (i - 1) % args.users + 1,
+            "updated_by_email": f"load{(i - 1) % args.users + 1}@example.com",
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(1, args.tickets + 1)
+    ]
+    visits = {}
+    rng = random.Random(args.seed)
+    for _ in range(args.visits):
+        visits[(rng.randint(1, args.users), rng.randint(1, args.projects))] = now
+    db["users"].insert_many(users)
+    db["projects"].insert_many(projects)
+    if tickets:
+        db["tickets"].insert_many(tickets)
+    if visits:
+        db["last_visit"].insert_many([
+            {"user_id": user_id, "project_id": project_id, "visited_at": visited_at}
+            for (user_id, project_id), visited_at in visits.items()
+        ])
+    db["counters"].insert_many([
+        {"_id": "users", "seq": args.users},
+        {"_id": "projects", "seq": args.projects},
+        {"_id": "tickets", "seq": args.tickets},
+    ])
+    return {"tickets": [t["id"] for t in tickets]}
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000
+
+    return {"count": len(values), "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99), "max_ms": ordered[-1] * 1000}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+async def run(args, seeded: dict) -> dict:
+    import httpx
+    import jwt
+    import uvicorn
+    import websockets
+    from backend.config import Config
+    from backend.main import app
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    def token(user_id: int) -> str:
+        return jwt.encode({"sub": str(user_id), "exp": int(time.time()) + 3600}, Config.JWT_SECRET, algorithm=Config.JWT_ALG)
+
+    rng = random.Random(args.seed)
+    mix = {}
+    for part in args.mix.split(","):
+        name, weight = part.split("=")
+        mix[name.strip()] = float(weight)
+    ticket_ids = list(seeded["tickets"])
+    latencies: dict[str, list] = {name: [] for name in mix}
+    errors: dict[str, int] = {name: 0 for name in mix}
+    sent_at: dict[int, float] = {}
+    ws_lags: list = []
+    ws_frames = 0
+
+    async def subscriber(user_id: int, project_id: int, ready: asyncio.Event):
+        nonlocal ws_frames
+        url = f"ws://127.0.0.1:{port}/ws/activity?token={token(user_id)}&project_id={project_id}"
+        async with websockets.connect(url) as sock:
+            ready.set()
+            async for frame in sock:
+                received = time.perf_counter()
+                ws_frames += 1
+                payload = json.loads(frame)
+                # coalesced frames carry an array of events
+                for event in payload if isinstance(payload, list) else [payload]:
+                    if event.get("event") == "ping":
+                        await sock.send("pong")
+                        continue
+                    ticket_id = (event.get("data") or {}).get("ticket_id")
+                    if ticket_id in sent_at:
+                        ws_lags.append(received - sent_at[ticket_id])
+
+    subscribers = []
+    for i in range(args.ws_subscribers):
+        ready = asyncio.Event()
+        subscribers.append(asyncio.create_task(subscriber(i % args.users + 1, i % args.projects + 1, ready)))
+        await ready.wait()
+
+    async def worker(worker_id: int, client: "httpx.AsyncClient", deadline: float):
+        headers = {"Authorization": f"Bearer {token(worker_id % args.users + 1)}"}
+        names, weights = list(mix), list(mix.values())
+        while time.perf_counter() < deadline:
+            op = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            if op == "get_project":
+                response = await client.get(f"/api/projects/{rng.randint(1, args.projects)}", headers=headers)
+            elif op == "create_ticket":
+                response = await client.post("/api/tickets", headers=headers, json={
+                    "project_id": rng.randint(1, args.projects), "description": "load test ticket",
+                })
+                if response.status_code == 201:
+                    ticket_id = response.json()["ticket"]["id"]
+                    ticket_ids.append(ticket_id)
+                    sent_at[ticket_id] = started
+            elif op == "update_ticket":
+                ticket_id = rng.choice(ticket_ids)
+                sent_at[ticket_id] = started
+                response = await client.patch(f"/api/tickets/{ticket_id}", headers=headers, json={"status": rng.choice(STATUSES)})
+            else:
+                raise SystemExit(f"unknown operation in --mix: {op}")
+            latencies[op].append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors[op] += 1
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(worker(i, client, deadline) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    await asyncio.sleep(1)  # let in-flight notifications reach the subscribers
+    for task in subscribers:
+        task.cancel()
+    await asyncio.gather(*subscribers, return_exceptions=True)
+    server.should_exit = True
+    await server_task
+
+    total = sum(len(v) for v in latencies.values())
+    return {
+        "requests": total,
+        "requests_per_second": total / elapsed,
+        "errors": errors,
+        "latency": {name: percentiles(values) for name, values in latencies.items()},
+        "ws_delivery_lag": percentiles(ws_lags),
+        "ws_frames": ws_frames,
+    }
+
+
+def compare(current: dict, previous_path: str) -> None:
+    previous = json.loads(Path(previous_path).read_text())
+
+    def change(new, old):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"vs {previous_path} ({previous.get('git_revision')}):")
+    print(f"  requests/s  {previous['results']['requests_per_second']:.1f} -> "
+          f"{current['results']['requests_per_second']:.1f} ({change(current['results']['requests_per_second'], previous['results']['requests_per_second'])})")
+    for name, stats in current["results"]["latency"].items():
+        old = previous["results"]["latency"].get(name, {})
+        if stats.get("count") and old.get("count"):
+            print(f"  {name:14s} p95 {old['p95_ms']:.1f}ms -> {stats['p95_ms']:.1f}ms ({change(stats['p95_ms'], old['p95_ms'])})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="run against this MongoDB instead of mongomock")
+    parser.add_argument("--db-name", default="ticket_dashboard_loadtest")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--tickets", type=int, default=2000)
+    parser.add_argument("--visits", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20, help="seconds")
+    parser.add_argument("--mix", default="get_project=60,create_ticket=20,update_ticket=20")
+    parser.add_argument("--ws-subscribers", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<timestamp>-<rev>.json)")
+    parser.add_argument("--compare", help="previous result file to diff against")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    if not args.database_url:
+        install_mongomock()
+    seeded = seed(args)
+
+    results = asyncio.run(run(args, seeded))
+    report = {
+        "git_revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "stand_in": "mongod" if args.database_url else "mongomock",
+        "args": {k: v for k, v in vars(args).items() if k not in ("database_url", "output", "compare")},
+        "results": results,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{report['git_revision'] or 'norev'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(json.dumps(results, indent=2))
+    print(f"saved {output}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
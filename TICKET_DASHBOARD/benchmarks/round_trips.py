@@ -0,0 +1,91 @@
+"""Mongo round-trips per request on the ticket write paths.
+
+    python -m benchmarks.round_trips --requests 50
+
+Runs the app on mongomock through the sync driver path, where every
+collection call is one hop to the driver thread, and counts those hops per
+PATCH /api/tickets/{id}, POST /api/tickets and POST /api/tickets/bulk.
+Authentication is warmed first and notifications are queued, not delivered
+(the app runs without its lifespan), so the counts cover the handler only.
+"""
+import argparse
+import json
+import random
+import time
+from types import SimpleNamespace
+
+from benchmarks.loadtest import STATUSES, configure_environment, install_mongomock, seed
+
+
+class RoundTripCounter:
+    def __init__(self, run_sync):
+        self._run_sync = run_sync
+        self.count = 0
+
+    async def run_sync(self, *args, **kwargs):
+        self.count += 1
+        return await self._run_sync(*args, **kwargs)
+
+
+def measure(client, counter: RoundTripCounter, call, requests: int) -> dict:
+    counts = []
+    for _ in range(requests):
+        before = counter.count
+        response = call()
+        response.raise_for_status()
+        counts.append(counter.count - before)
+    return {"requests": requests, "mean": sum(counts) / len(counts), "min": min(counts), "max": max(counts)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--bulk-size", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    configure_environment(SimpleNamespace(db_name="round_trips", database_url=None))
+    install_mongomock()
+
+    import anyio
+    import jwt
+    from fastapi.testclient import TestClient
+    from backend import db as db_module
+    from backend.config import Config
+    from backend.main import app
+
+    seeded = seed(SimpleNamespace(users=1, projects=4, tickets=200, visits=0, seed=args.seed))
+    counter = RoundTripCounter(anyio.to_thread.run_sync)
+    db_module.anyio = SimpleNamespace(to_thread=SimpleNamespace(run_sync=counter.run_sync))
+
+    token = jwt.encode({"sub": "1", "exp": int(time.time()) + 3600}, Config.JWT_SECRET, algorithm=Config.JWT_ALG)
+    headers = {"Authorization": f"Bearer {token}"}
+    rng = random.Random(args.seed)
+    ticket_ids = seeded["tickets"]
+
+    def patch():
+        return client.patch(f"/api/tickets/{rng.choice(ticket_ids)}", json={"status": rng.choice(STATUSES)}, headers=headers)
+
+    def create():
+        return client.post("/api/tickets", json={"project_id": rng.randint(1, 4), "description": "round trip"}, headers=headers)
+
+    def bulk():
+        ids = rng.sample(ticket_ids, args.bulk_size)
+        return client.post("/api/tickets/bulk", json={"update": [{"id": i, "status": rng.choice(STATUSES)} for i in ids]},
+                           headers=headers)
+
+    client = TestClient(app)
+    client.get("/auth/me", headers=headers).raise_for_status()
+
+    results = {
+        "patch_ticket": measure(client, counter, patch, args.requests),
+        # a second pass has every ticket's project cached
+        "patch_ticket_warm": measure(client, counter, patch, args.requests),
+        "create_ticket": measure(client, counter, create, args.requests),
+        f"bulk_update_{args.bulk_size}": measure(client, counter, bulk, max(1, args.requests // 10)),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
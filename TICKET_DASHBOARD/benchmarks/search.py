@@ -0,0 +1,117 @@
+"""GET /api/tickets/search latency on a large seeded ticket collection.
+
+    python -m benchmarks.search --database-url mongodb://localhost:27017 --tickets 100000 --queries 500
+
+Needs a real mongod: mongomock has no $text support. Seeds --tickets tickets
+with descriptions drawn from a fixed vocabulary into --db-name, builds the
+indexes through the app's lifespan, then replays a mix of single-term,
+multi-term, filtered and second-page searches and reports latency
+percentiles per kind against --target-p95-ms.
+"""
+import argparse
+import json
+import random
+import time
+from types import SimpleNamespace
+
+from benchmarks.loadtest import STATUSES, configure_environment, percentiles
+
+WORDS = (
+    "login signup password reset email otp token session cookie cache index query timeout retry "
+    "dashboard board ticket project sprint deploy release build pipeline docker render vercel "
+    "websocket socket reconnect heartbeat latency slow crash error exception stack trace null "
+    "button modal dropdown layout mobile desktop dark theme font color icon avatar upload image "
+    "search filter sort pagination cursor export import csv pdf report chart metric alert"
+).split()
+
+
+def seed(args) -> None:
+    from backend.db import get_db, utc_now
+
+    db = get_db()
+    db["tickets"].delete_many({})
+    db["projects"].delete_many({})
+    rng = random.Random(args.seed)
+    now = utc_now()
+    db["projects"].insert_many([{"id": i, "name": f"Search project {i}", "created_at": now, "version": 0}
+                                for i in range(1, args.projects + 1)])
+    batch = []
+    for i in range(1, args.tickets + 1):
+        creator = rng.randint(1, args.users)
+        batch.append({
+            "id": i,
+            "project_id": rng.randint(1, args.projects),
+            "description": " ".join(rng.choices(WORDS, k=rng.randint(4, 16))),
+            "status": rng.choice(STATUSES),
+            "creator_id": creator,
+            "creator_email": f"search{creator}@example.com",
+            "updated_by_id": creator,
+            "updated_by_email": f"search{creator}@example.com",
+            "created_at": now,
+            "updated_at": now,
+        })
+        if len(batch) == 10000:
+            db["tickets"].insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db["tickets"].insert_many(batch, ordered=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--db-name", default="ticket_dashboard_search_bench")
+    parser.add_argument("--tickets", type=int, default=100000)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--target-p95-ms", type=float, default=50)
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the tickets from a previous run")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    configure_environment(SimpleNamespace(db_name=args.db_name, database_url=args.database_url))
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    if not args.skip_seed:
+        started = time.perf_counter()
+        seed(args)
+        print(f"seeded {args.tickets} tickets in {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(args.seed)
+    kinds = {
+        "one_term": lambda: {"q": rng.choice(WORDS)},
+        "two_terms": lambda: {"q": " ".join(rng.sample(WORDS, 2))},
+        "project_filter": lambda: {"q": rng.choice(WORDS), "project_id": rng.randint(1, args.projects)},
+        "status_filter": lambda: {"q": rng.choice(WORDS), "status": rng.choice(STATUSES)},
+        "creator_filter": lambda: {"q": rng.choice(WORDS), "creator_email": f"search{rng.randint(1, args.users)}@example.com"},
+    }
+    latencies = {name: [] for name in [*kinds, "second_page"]}
+
+    with TestClient(app) as client:
+        # the lifespan has built description_text; one untimed query warms the plan cache
+        client.get("/api/tickets/search", params={"q": WORDS[0]}).raise_for_status()
+        for _ in range(args.queries):
+            name = rng.choice(list(kinds))
+            params = {**kinds[name](), "page_size": args.page_size}
+            started = time.perf_counter()
+            response = client.get("/api/tickets/search", params=params)
+            latencies[name].append(time.perf_counter() - started)
+            response.raise_for_status()
+
+            cursor = response.headers.get("x-next-cursor")
+            if cursor:
+                started = time.perf_counter()
+                client.get("/api/tickets/search", params={**params, "cursor": cursor}).raise_for_status()
+                latencies["second_page"].append(time.perf_counter() - started)
+
+    results = {name: percentiles(values) for name, values in latencies.items()}
+    worst = max((r["p95_ms"] for r in results.values() if r["count"]), default=0)
+    print(json.dumps({"tickets": args.tickets, "target_p95_ms": args.target_p95_ms, "results": results}, indent=2))
+    print(f"{'PASS' if worst <= args.target_p95_ms else 'FAIL'}: worst p95 {worst:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Response serialization cost for a 5k-ticket board.
+
+    python -m benchmarks.serialization --tickets 5000 --rounds 20
+
+Compares the old path (jsonable_encoder + JSONResponse), response_model
+validation through pydantic-core, and FastJSONResponse (orjson).
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from backend.responses import FastJSONResponse
+from backend.schemas import ProjectDetailOut
+
+
+def board(tickets: int) -> dict:
+    # naive datetimes, as pymongo returns BSON dates
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return {
+        "project": {"id": 1, "name": "Benchmark board", "created_at": now},
+        "tickets": [
+            {
+                "id": i,
+                "project_id": 1,
+                "description": f"Ticket {i} " + "lorem ipsum " * 4,
+                "status": ("proposed", "todo", "inprogress", "done", "deployed")[i % 5],
+                "creator_id": i % 50,
+                "creator_email": f"user{i % 50}@example.com",
+                "updated_by_id": i % 50,
+                "updated_by_email": f"user{i % 50}@example.com",
+                "created_at": now - timedelta(minutes=i),
+                "updated_at": now,
+            }
+            for i in range(1, tickets + 1)
+        ],
+    }
+
+
+def measure(fn, rounds: int) -> dict:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - started)
+    return {"ms_median": statistics.median(timings) * 1000, "ms_min": min(timings) * 1000, "bytes": len(body)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    content = board(args.tickets)
+    adapter = TypeAdapter(ProjectDetailOut)
+
+    results = {
+        "jsonable_encoder": measure(lambda: JSONResponse(content=jsonable_encoder(content)).body, args.rounds),
+        "response_model": measure(
+            lambda: JSONResponse(content=adapter.dump_python(adapter.validate_python(content), mode="json")).body,
+            args.rounds,
+        ),
+        "fast_json": measure(lambda: FastJSONResponse(content=content).body, args.rounds),
+    }
+    print(json.dumps({"tickets": args.tickets, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Import time of backend.main and time until the probes answer.
+
+    python -m benchmarks.startup --top 15
+
+Runs `python -X importtime -c "import backend.main"` in a fresh interpreter and
+reports the cumulative import time of the slowest packages. Then starts the app's
+lifespan against mongomock, and again against an unreachable --database-url,
+and reports how long it takes until /health answers and until /ready turns 200.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+from benchmarks.loadtest import configure_environment, install_mongomock
+
+
+def import_times(top: int) -> dict:
+    env = {**os.environ, "JWT_SECRET": os.environ.get("JWT_SECRET") or "startup-secret-" + "x" * 32}
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import backend.main"],
+                            capture_output=True, text=True, env=env, check=True)
+    wall = time.perf_counter() - started
+    packages: dict[str, float] = {}
+    total_ms = 0.0
+    for line in result.stderr.splitlines():
+        fields = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name, cumulative_ms = fields[2].strip(), int(fields[1]) / 1000
+        if name == "backend.main":
+            total_ms = cumulative_ms
+        # a package's first (outermost) import carries the cost of everything below it
+        if "." not in name:
+            packages[name] = max(packages.get(name, 0.0), cumulative_ms)
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "interpreter_wall_ms": round(wall * 1000, 1),
+        "backend_main_ms": round(total_ms, 1),
+        "slowest_packages_ms": {name: round(ms, 1) for name, ms in slowest},
+    }
+
+
+def probe_times(timeout: float) -> dict:
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    started = time.perf_counter()
+    with TestClient(app) as client:
+        health_status = client.get("/health").status_code
+        health_ms = (time.perf_counter() - started) * 1000
+        ready_status = client.get("/ready").status_code
+        while ready_status != 200 and time.perf_counter() - started < timeout:
+            time.sleep(0.05)
+            ready_status = client.get("/ready").status_code
+        ready_ms = (time.perf_counter() - started) * 1000
+    return {
+        "health_status": health_status,
+        "health_ms": round(health_ms, 1),
+        "ready_status": ready_status,
+        "ready_ms": round(ready_ms, 1) if ready_status == 200 else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--database-url", default="mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=500",
+                        help="unreachable by default: /health must answer while /ready stays 503")
+    parser.add_argument("--timeout", type=float, default=3)
+    args = parser.parse_args()
+
+    # each lifespan runs in its own interpreter, Config is read at import time
+    mode = os.environ.get("STARTUP_BENCH_MODE")
+    if mode:
+        if mode == "mongomock":
+            configure_environment(SimpleNamespace(db_name="startup_bench", database_url=None))
+            install_mongomock()
+        else:
+            configure_environment(SimpleNamespace(db_name="startup_bench", database_url=args.database_url))
+            os.environ["MONGO_WARMUP_RETRY_SECONDS"] = "0.5"
+        print(json.dumps(probe_times(args.timeout)))
+        return
+
+    results = {"imports": import_times(args.top)}
+    for mode in ("mongomock", "unreachable"):
+        output = subprocess.run([sys.executable, "-m", "benchmarks.startup", *sys.argv[1:]], capture_output=True,
+                                text=True, env={**os.environ, "STARTUP_BENCH_MODE": mode}, check=True).stdout
+        results[f"lifespan_{mode}"] = json.loads(output.strip().splitlines()[-1])
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
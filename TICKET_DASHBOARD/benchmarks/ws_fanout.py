@@ -0,0 +1,89 @@
+"""WebSocket fan-out latency with simulated sockets.
+
+    python -m benchmarks.ws_fanout --sockets 2000 --projects 20 --slow 50
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from backend import ws
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.received: list[float] = []
+
+    async def send_text(self, message: str) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received.append(time.perf_counter())
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(sockets: int, projects: int, slow: int, events: int) -> dict:
+    await ws.start_fanout()
+    connections = []
+    for i in range(sockets):
+        fake = FakeWebSocket(delay=1.0 if i < slow else 0.0)
+        conn = ws.Connection(fake, user_id=i + 1, project_id=i % projects)
+        ws.register(conn)
+        conn.start()
+        connections.append(conn)
+
+    fast = [c for c in connections if not c.websocket.delay]
+    latencies = []
+    broadcast_times = []
+    for n in range(events):
+        project_id = n % projects
+        targets = [c for c in fast if c.project_id == project_id]
+        before = {id(c): len(c.websocket.received) for c in targets}
+
+        started = time.perf_counter()
+        await ws.broadcast(json.dumps({"event": "activity", "data": {"project_id": project_id}}), project_id=project_id)
+        broadcast_times.append(time.perf_counter() - started)
+
+        while any(len(c.websocket.received) == before[id(c)] for c in targets):
+            await asyncio.sleep(0)
+        latencies.extend(c.websocket.received[-1] - started for c in targets)
+
+    for conn in connections:
+        await conn.close()
+    await ws.stop_fanout()
+
+    return {
+        "sockets": sockets,
+        "projects": projects,
+        "slow_sockets": slow,
+        "events": events,
+        "broadcast_call_ms_p50": statistics.median(broadcast_times) * 1000,
+        "delivery_ms_p50": percentile(latencies, 50) * 1000,
+        "delivery_ms_p95": percentile(latencies, 95) * 1000,
+        "delivery_ms_p99": percentile(latencies, 99) * 1000,
+        "delivery_ms_max": max(latencies) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sockets", type=int, default=2000)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--slow", type=int, default=50, help="sockets that take 1s per send")
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.sockets, args.projects, args.slow, args.events))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
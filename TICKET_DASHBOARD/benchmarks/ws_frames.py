@@ -0,0 +1,124 @@
+"""WebSocket frames and bytes per subscriber for bursts of activity events.
+
+    python -m benchmarks.ws_frames --sockets 200 --bursts 20 --burst-size 50 --window-ms 50
+
+Simulates bulk moves: each burst publishes --burst-size activity events for
+one project back to back, then waits out the coalescing window. Every mode
+runs the same bursts through ws.Connection with recording sockets; frames are
+decoded the way a client would (streaming inflate, msgpack/JSON) to check
+that no event is lost.
+"""
+import argparse
+import asyncio
+import json
+import time
+import zlib
+
+import msgpack
+
+from backend import ws
+from backend.config import Config
+
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+        self.payloads: list = []
+
+    async def send_text(self, message: str) -> None:
+        self.frames += 1
+        self.bytes += len(message.encode())
+        self.payloads.append(message)
+
+    async def send_bytes(self, message: bytes) -> None:
+        self.frames += 1
+        self.bytes += len(message)
+        self.payloads.append(message)
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+def count_events(sock: RecordingWebSocket, encoding: str, compress: bool) -> int:
+    inflater = zlib.decompressobj(wbits=-15)
+    events = 0
+    for payload in sock.payloads:
+        if compress:
+            payload = inflater.decompress(payload)
+        frame = msgpack.unpackb(payload) if encoding == "msgpack" else json.loads(payload)
+        events += len(frame) if isinstance(frame, list) else 1
+    return events
+
+
+async def run_mode(args, encoding: str, compress: bool, window: float) -> dict:
+    Config.WS_COALESCE_WINDOW_SECONDS = window
+    connections = []
+    for i in range(args.sockets):
+        conn = ws.Connection(RecordingWebSocket(), user_id=i + 1, project_id=1, encoding=encoding, compress=compress)
+        ws.register(conn)
+        conn.start()
+        connections.append(conn)
+
+    ticket_id = 0
+    started = time.perf_counter()
+    for burst in range(args.bursts):
+        for _ in range(args.burst_size):
+            ticket_id += 1
+            message = json.dumps({"event": "activity", "data": {
+                "project_id": 1,
+                "message": f"user{burst}@example.com moved Ticket:{ticket_id} from todo to deployed",
+                "ticket_id": ticket_id,
+                "change_token": ticket_id,
+            }})
+            await ws.deliver_local(message, project_id=1)
+        # let every socket drain the burst before the next one
+        while any(not c.queue.empty() for c in connections):
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(window + 0.01)
+    elapsed = time.perf_counter() - started
+
+    sockets = [c.websocket for c in connections]
+    lost = sum(args.bursts * args.burst_size - count_events(s, encoding, compress) for s in sockets)
+    for conn in connections:
+        await conn.close()
+
+    return {
+        "frames_per_socket": sum(s.frames for s in sockets) / len(sockets),
+        "bytes_per_socket": sum(s.bytes for s in sockets) / len(sockets),
+        "events_lost": lost,
+        "seconds": elapsed,
+    }
+
+
+async def run(args) -> dict:
+    window = args.window_ms / 1000
+    modes = {
+        "json_per_event": ("json", False, 0.0),
+        "json_coalesced": ("json", False, window),
+        "json_coalesced_deflate": ("json", True, window),
+        "msgpack_coalesced": ("msgpack", False, window),
+        "msgpack_coalesced_deflate": ("msgpack", True, window),
+    }
+    results = {name: await run_mode(args, *mode) for name, mode in modes.items()}
+    baseline = results["json_per_event"]
+    for result in results.values():
+        result["frames_saved_pct"] = 100 * (1 - result["frames_per_socket"] / baseline["frames_per_socket"])
+        result["bytes_saved_pct"] = 100 * (1 - result["bytes_per_socket"] / baseline["bytes_per_socket"])
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sockets", type=int, default=200)
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--burst-size", type=int, default=50)
+    parser.add_argument("--window-ms", type=float, default=50)
+    args = parser.parse_args()
+    # sockets must not be dropped as slow consumers while a burst is queued
+    Config.WS_SEND_QUEUE_SIZE = max(Config.WS_SEND_QUEUE_SIZE, args.burst_size * 2)
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -55,8 +55,13 @@ export default function ProjectDetailPage() {
 
     ws.onmessage = (event) => {
       try {
-        const data = JSON.parse(event.data);
-        if (data.event === 'activity' && data.data?.project_id == projectId) {
+        // events arriving within the server's coalescing window share one array frame
+        const frame = JSON.parse(event.data);
+        const events = Array.isArray(frame) ? frame : [frame];
+        if (events.some((data) => data.event === 'ping')) {
+          ws.send('pong');
+        }
+        if (events.some((data) => data.event === 'activity' && data.data?.project_id == projectId)) {
           fetchProjectDetails();
         }
       } catch {}